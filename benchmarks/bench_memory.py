@@ -0,0 +1,108 @@
+# benchmarks/bench_memory.py
+"""
+Memory: old per-tip dicts vs core.tip.Tip
+
+    python -m benchmarks.bench_memory            # 10k + 100k
+    python -m benchmarks.bench_memory 50000
+
+Builds a /show_tips/-shaped JSON payload, decodes it, converts it into cache
+entries both ways and reports the memory still held once the payload is gone.
+"""
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from core.tip import Tip
+
+
+def make_payload(n, groups=20, members=50, seed=1):
+    rnd = random.Random(seed)
+    names = [f"成员{i}" for i in range(members)]
+    private, public, maps = [], [], {}
+    for i in range(1, n + 1):
+        tip = {
+            'index': i,
+            'content': f"第{i}条便签 - 记得处理一下这个事情",
+            'ddl': f"26-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} {rnd.randint(0, 23):02d}:00",
+            'is_done': rnd.random() < 0.3,
+        }
+        if i % 3:
+            gid = rnd.randint(1, groups)
+            tip.update({
+                'group_id': gid,
+                'group_name': f"小组{gid}",
+                'owner_name': rnd.choice(names),
+                'completed_members': rnd.sample(names, rnd.randint(0, 3)),
+            })
+            public.append(tip)
+        else:
+            private.append(tip)
+        maps[str(i)] = 100000 + i
+    return json.dumps({'private_tips': private, 'public_tips': public, 'maps': maps})
+
+
+def build_dicts(data):
+    """The pre-Tip fetch_tips conversion"""
+    maps = data['maps']
+    cache = []
+    for tip in data['private_tips']:
+        cache.append({
+            'index': tip['index'], 'real_id': maps.get(str(tip['index'])),
+            'content': tip['content'], 'ddl': tip['ddl'], 'is_done': tip['is_done'],
+            'type': 'PRIVATE', 'completed_members': [], 'group_id': None,
+        })
+    for tip in data['public_tips']:
+        cache.append({
+            'index': tip['index'], 'real_id': maps.get(str(tip['index'])),
+            'content': tip['content'], 'ddl': tip['ddl'], 'is_done': tip['is_done'],
+            'type': 'GROUP', 'group_id': tip.get('group_id'),
+            'group_name': tip.get('group_name', 'Unknown'),
+            'owner': tip.get('owner_name', 'Unknown'),
+            'completed_members': tip.get('completed_members', []),
+        })
+    return cache
+
+
+def build_tips(data):
+    maps = data['maps']
+    cache = [Tip.from_private(t, maps.get(str(t['index']))) for t in data['private_tips']]
+    cache += [Tip.from_public(t, maps.get(str(t['index']))) for t in data['public_tips']]
+    return cache
+
+
+def retained(builder, raw):
+    """Bytes still allocated after building the cache and dropping the payload"""
+    gc.collect()
+    tracemalloc.start()
+    data = json.loads(raw)
+    cache = builder(data)
+    del data
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+    return current
+
+
+def run(sizes):
+    results = []
+    for n in sizes:
+        raw = make_payload(n)
+        as_dicts = retained(build_dicts, raw)
+        as_tips = retained(build_tips, raw)
+        results.append({
+            'tips': n,
+            'dict_bytes': as_dicts,
+            'tip_bytes': as_tips,
+            'saved_pct': round(100 * (1 - as_tips / as_dicts), 1),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for r in run(sizes):
+        print(f"{r['tips']:>7} tips | dict {r['dict_bytes'] / 1e6:7.2f} MB | "
+              f"Tip {r['tip_bytes'] / 1e6:7.2f} MB | saved {r['saved_pct']}%")
@@ -0,0 +1,54 @@
+# benchmarks/compare.py
+"""
+比较两次基准结果 (Compare two benchmarks/run.py reports)
+
+    python -m benchmarks.compare base.json new.json [--threshold 15]
+
+Prints median timings side by side and exits with status 1 when any metric
+got slower (or any memory figure grew) by more than the threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def _rows(base, new):
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        old = base["results"].get(name, {}).get("median_ms")
+        cur = new["results"].get(name, {}).get("median_ms")
+        yield name, old, cur, "ms"
+    for name in sorted(set(base.get("memory", {})) | set(new.get("memory", {}))):
+        yield name, base.get("memory", {}).get(name), new.get("memory", {}).get(name), "B"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=15.0, help="regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"base {base['meta'].get('commit')} ({base['meta']['tips']} tips)  ->  "
+          f"new {new['meta'].get('commit')} ({new['meta']['tips']} tips)")
+    regressions = []
+    for name, old, cur, unit in _rows(base, new):
+        if old is None or cur is None:
+            print(f"  {name:<24} {str(old):>12} {str(cur):>12}   (missing)")
+            continue
+        change = (cur - old) / old * 100 if old else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  <-- REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<24} {old:>12.3f} {cur:>12.3f} {unit:<2} {change:+7.1f}%{flag}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# benchmarks/importtime.py
+"""
+启动导入预算检查 (Import-time budget for the auto-login path)
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --budget-ms 120 --runs 5
+
+Runs the cached-session start (import main, auto_login = first fetch + group list) in a
+fresh interpreter under `python -X importtime`, against a canned in-process
+HTTP adapter. Fails (exit 1) when
+- the summed import time (best of --runs) is over the budget, or
+- a module that must stay lazy (cryptography, rich, readline) got imported.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 150
+
+# 自动登录路径上不允许出现的模块 (顶层包名)
+LAZY_MODULES = ("cryptography", "rich", "readline")
+
+# 子进程里跑的自动登录路径；最后一行打印已加载的“懒”模块
+SCENARIO = r"""
+import sys
+import main
+import asyncio
+from requests.adapters import BaseAdapter
+from core.client import TipsClient
+from core.async_client import AsyncTipsClient
+from stub_backend import make_response
+
+class Canned(BaseAdapter):
+    def send(self, request, **kwargs):
+        return make_response(request, 200, b'{"private_tips": [], "public_tips": [], "maps": {}}')
+    def close(self):
+        pass
+
+client = TipsClient(server_url="http://importtime.local")
+client.store_path = None
+client.current_user = "importtime"
+client.session.mount("http://importtime.local", Canned())
+aclient = AsyncTipsClient(client)
+ok, msg = asyncio.run(aclient.auto_login())
+aclient.close()
+assert ok, msg
+print(",".join(sorted({m.split(".")[0] for m in sys.modules} & set(%r))))
+""" % (LAZY_MODULES,)
+
+
+def _top_level_imports(stderr):
+    """Parse `-X importtime` output -> {module: cumulative_us} for top-level imports"""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            # 缩进 = 被别的模块间接导入，已算在上层的 cumulative 里
+            continue
+        result[name.strip()] = int(cumulative)
+    return result
+
+
+def _run(code):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"scenario failed:\n{proc.stderr[-2000:]}")
+    return proc.stdout.strip(), _top_level_imports(proc.stderr)
+
+
+def measure():
+    """Return (import_ms, lazy_modules_loaded, slowest [(module, ms)])"""
+    # 解释器自己启动时的导入 (site 等) 不算
+    _, baseline = _run("pass")
+    stdout, imports = _run(SCENARIO)
+    # stub_backend 只是这里的测试桩，不在启动路径上
+    own = {name: us for name, us in imports.items() if name not in baseline and name != "stub_backend"}
+    total_ms = sum(own.values()) / 1000
+    slowest = sorted(own.items(), key=lambda kv: -kv[1])[:5]
+    loaded = [m for m in stdout.splitlines()[-1].split(",") if m] if stdout else []
+    return total_ms, loaded, [(name, us / 1000) for name, us in slowest]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time budget for the auto-login path")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="take the best of N runs")
+    args = parser.parse_args(argv)
+
+    best = None
+    for _ in range(args.runs):
+        total_ms, loaded, slowest = measure()
+        if best is None or total_ms < best[0]:
+            best = (total_ms, loaded, slowest)
+    total_ms, loaded, slowest = best
+
+    print(f"auto-login imports: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, ms in slowest:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: imported on the auto-login path: {', '.join(loaded)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+# benchmarks/run.py
+"""
+客户端性能基准 (Benchmark suite, runs fully offline)
+
+    python -m benchmarks.run --tips 10000 --out bench.json
+    python -m benchmarks.run --tips 100000 --repeat 3
+    python -m benchmarks.compare old.json new.json
+
+Everything talks to an in-process StubBackend (stub_backend.py) mounted on the
+client's requests session, so numbers measure the client, not the network.
+Results are JSON: {"meta": {...}, "results": {name: {"median_ms", ...}}}.
+"""
+import argparse
+import gc
+import gzip
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from requests.adapters import BaseAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from stub_backend import StubBackend, STUB_URL, make_response  # noqa: E402
+from core.client import TipsClient  # noqa: E402
+
+
+def timed(fn, repeat, setup=None):
+    """Run fn `repeat` times (setup() before each, untimed); return stats in ms"""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": repeat,
+    }
+
+
+class CannedAdapter(BaseAdapter):
+    """Always answers with the same pre-encoded body (keeps the stub out of memory numbers)"""
+    def __init__(self, body):
+        super().__init__()
+        self.body = body
+
+    def send(self, request, **kwargs):
+        return make_response(request, 200, self.body)
+
+    def close(self):
+        pass
+
+
+def make_client(backend, store_dir):
+    client = TipsClient(server_url=STUB_URL)
+    client.store_path = os.path.join(store_dir, "bench_store.db")
+    client.current_user = "stub"
+    client.current_user_id = backend.user_id
+    backend.mount(client.session)
+    return client
+
+
+# =============================================================================
+# 单项基准
+# =============================================================================
+
+def bench_fetch(backend, store_dir, repeat):
+    client = make_client(backend, store_dir)
+    results = {"fetch_full": timed(lambda: client.fetch_tips(full=True), repeat)}
+    client.stream_fetch = not client.stream_fetch
+    results["fetch_full_buffered" if client.stream_fetch is False else "fetch_full_streamed"] = \
+        timed(lambda: client.fetch_tips(full=True), repeat)
+    client.stream_fetch = not client.stream_fetch
+
+    def touch_ten():
+        # 让服务器上有 10 条变化，再测 delta 同步
+        client.fetch_tips()
+        with backend.lock:
+            for rid in list(backend.tips)[:10]:
+                backend.tips[rid]['version'] = backend._bump()
+    results["fetch_delta_10"] = timed(client.fetch_tips, repeat, setup=touch_ten)
+    return results
+
+
+def bench_mutations(backend, store_dir, repeat):
+    client = make_client(backend, store_dir)
+    client.fetch_tips()
+    results = {}
+
+    def add():
+        m, _ = client.stage_add_tip("bench tip", "26-12-31 23:59", None)
+        client.commit(m)
+        client.reconcile(m)
+    results["mutation_add"] = timed(add, repeat)
+
+    def toggle():
+        first = client.local_cache[0].index
+        m, _ = client.stage_change_tip_state(str(first))
+        client.commit(m)
+        client.reconcile(m)
+    results["mutation_toggle"] = timed(toggle, repeat)
+
+    def delete():
+        last = client.local_cache[-1].index
+        m, _ = client.stage_delete_tips(str(last))
+        client.commit(m)
+        client.reconcile(m)
+    results["mutation_delete"] = timed(delete, repeat)
+
+    # 乐观更新里用户感知到的部分：只改本地缓存
+    def stage_only():
+        first = client.local_cache[0].index
+        m, _ = client.stage_change_tip_state(str(first))
+        m.undo()
+    results["mutation_stage_local"] = timed(stage_only, repeat)
+    return results
+
+
+def bench_frames(backend, store_dir, repeat):
+    from ui import renderer
+    client = make_client(backend, store_dir)
+    client.fetch_tips()
+    client.enter_group(1)
+
+    renderer.console.size = (100, 50)
+    renderer.screen.stream = io.StringIO()
+
+    def cold():
+        renderer._region_cache.clear()
+        renderer.invalidate()
+        renderer.status_board.reset()
+    results = {"frame_cold": timed(lambda: renderer.draw_main_ui(client, "bench"), repeat, setup=cold)}
+    results["frame_steady"] = timed(lambda: renderer.draw_main_ui(client, "bench"), repeat)
+
+    def change():
+        first = client.local_cache[0].index
+        client.stage_change_tip_state(str(first))
+    results["frame_after_change"] = timed(lambda: renderer.draw_main_ui(client, "bench"), repeat, setup=change)
+
+    renderer.screen.stream = sys.stdout
+    return results
+
+
+def bench_search(backend, store_dir, repeat):
+    client = make_client(backend, store_dir)
+    client.fetch_tips()
+    results = {"search_build": timed(lambda: client.search("便签"), 1,
+                                     setup=lambda: setattr(client, "_search_index", None))}
+    results["search_word"] = timed(lambda: client.search("便签 处理"), repeat)
+    results["search_filters"] = timed(lambda: client.search("due:<24h done:no group:1"), repeat)
+
+    def change():
+        first = client.local_cache[0].index
+        client.stage_change_tip_state(str(first))
+    results["search_after_change"] = timed(lambda: client.search("done:no"), repeat, setup=change)
+    return results
+
+
+def bench_reminders(backend, store_dir, repeat):
+    from core.reminders import ReminderScheduler
+    client = make_client(backend, store_dir)
+    client.fetch_tips()
+    holder = {}
+
+    def build():
+        holder["r"] = ReminderScheduler(client.local_cache, lambda alerts: None)
+
+    def drop():
+        # 上一轮建的要先摘掉监听，不然后面的测量里它也在跟着更新
+        if "r" in holder:
+            holder.pop("r").stop()
+    results = {"reminders_build": timed(build, repeat, setup=drop)}
+    reminders = holder["r"]
+
+    # 一条 tip 变化只动它自己的堆条目
+    def change():
+        first = client.local_cache[0].index
+        m, _ = client.stage_change_tip_state(str(first))
+        m.undo()
+    results["reminders_change"] = timed(change, repeat)
+    results["reminders_next_due"] = timed(reminders.next_due, repeat)
+    reminders.stop()
+    return results
+
+
+def bench_cold_start(repeat):
+    """解释器启动 + import main (不登录、不联网)"""
+    cmd = [sys.executable, "-c", "import main"]
+    return {"cold_start_import": timed(
+        lambda: subprocess.run(cmd, cwd=ROOT, check=True, capture_output=True), repeat)}
+
+
+def bench_memory(backend, store_dir):
+    status, payload = backend.handle("GET", "/show_tips/")
+    body = json.dumps(payload).encode("utf-8")
+    del payload
+
+    def measure(stream):
+        client = TipsClient(server_url=STUB_URL)
+        client.store_path = None
+        client.stream_fetch = stream
+        client.session.mount(STUB_URL, CannedAdapter(body))
+        gc.collect()
+        tracemalloc.start()
+        client.fetch_tips(full=True)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, current
+
+    # body 在测量前就已经在内存里 (两种模式都不算它)，所以差值只来自解析方式
+    streamed_peak, retained = measure(True)
+    buffered_peak, _ = measure(False)
+    return {
+        "fetch_peak_bytes": streamed_peak,
+        "fetch_peak_bytes_buffered": buffered_peak,
+        "cache_retained_bytes": retained,
+        "payload_bytes": len(body),
+        "payload_gzip_bytes": len(gzip.compress(body, compresslevel=5)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TipsClient benchmarks (offline)")
+    parser.add_argument("--tips", type=int, default=10_000)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write JSON results here (default: stdout)")
+    parser.add_argument("--skip", action="append", default=[],
+                        choices=["fetch", "mutations", "frames", "search", "reminders", "cold_start", "memory"])
+    args = parser.parse_args(argv)
+
+    backend = StubBackend()
+    backend.populate(args.tips, groups=args.groups)
+
+    results, memory = {}, {}
+    with tempfile.TemporaryDirectory() as store_dir:
+        if "fetch" not in args.skip:
+            results.update(bench_fetch(backend, store_dir, args.repeat))
+        if "mutations" not in args.skip:
+            results.update(bench_mutations(backend, store_dir, args.repeat))
+        if "frames" not in args.skip:
+            results.update(bench_frames(backend, store_dir, args.repeat))
+        if "search" not in args.skip:
+            results.update(bench_search(backend, store_dir, args.repeat))
+        if "reminders" not in args.skip:
+            results.update(bench_reminders(backend, store_dir, args.repeat))
+        if "cold_start" not in args.skip:
+            results.update(bench_cold_start(args.repeat))
+        if "memory" not in args.skip:
+            memory = bench_memory(backend, store_dir)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tips": args.tips,
+            "groups": args.groups,
+            "repeat": args.repeat,
+            "timestamp": int(time.time()),
+        },
+        "results": results,
+        "memory": memory,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
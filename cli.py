@@ -0,0 +1,292 @@
+# cli.py
+"""
+一次性命令 (Non-interactive one-shot commands for scripts and cron)
+
+    tips ls [--private | --group GID] [--offline] [--format json|tsv]
+    tips add CONTENT [--ddl "YY-MM-DD HH:MM"] [--group GID]
+    tips done 1,2        tips undone 1,2
+    tips rm 1,2 [--group GID]
+    tips groups
+    tips search "周报 due:<24h done:no group:5" [--limit N] [--offline]
+    tips import FILE.csv|FILE.jsonl [--group GID] [--workers N] [--retries N]
+    tips export [--as jsonl|csv] [-o FILE] [--private | --group GID] [--offline]
+
+They reuse the cached login session and the local snapshot (of the profile
+picked with `tips --profile-name NAME ...`), never touch the
+alternate screen, Rich or readline, and print JSON (default) or TSV.
+Exit code: 0 ok, 1 request failed, 2 not logged in.
+Relative FILE paths are relative to the directory `tips` was started from
+(the launcher exports it as TIPS_CALLER_CWD before changing directory).
+"""
+import argparse
+import json
+import os
+import sys
+
+from core import bulk
+from core.client import TipsClient
+from core.tip import PRIVATE
+
+COMMANDS = ("ls", "add", "done", "undone", "rm", "groups", "search", "import", "export")
+
+TIP_FIELDS = ("index", "real_id", "type", "group_id", "group_name", "content",
+              "ddl", "is_done", "owner", "completed_members")
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog="tips", description="Tips one-shot commands",
+        epilog="Without a command `tips` starts the interactive client "
+               "(tips --signup to register, tips --profile to record timings). "
+               "tips --profile-name NAME ... uses another account / server.")
+    parser.add_argument("--format", choices=("json", "tsv"), default="json")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ls = sub.add_parser("ls", help="list tips")
+    scope = ls.add_mutually_exclusive_group()
+    scope.add_argument("--private", action="store_true", help="only private tips")
+    scope.add_argument("--group", type=int, metavar="GID", help="only tips of this group")
+    ls.add_argument("--offline", action="store_true", help="use the local snapshot, no request")
+
+    add = sub.add_parser("add", help="add a tip")
+    add.add_argument("content")
+    add.add_argument("--ddl", default="", help="deadline, YY-MM-DD HH:MM")
+    add.add_argument("--group", type=int, metavar="GID")
+
+    for name, text in (("done", "mark tips as done"), ("undone", "mark tips as not done")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument("indexes", help="comma separated, e.g. 1,2")
+
+    rm = sub.add_parser("rm", help="delete tips")
+    rm.add_argument("indexes", help="comma separated, e.g. 1,2")
+    rm.add_argument("--group", type=int, metavar="GID")
+
+    sub.add_parser("groups", help="list my groups")
+
+    search = sub.add_parser("search", help="find tips by words and done:/group:/due: filters")
+    search.add_argument("query", nargs="+", help='e.g. 周报 due:<24h done:no group:5')
+    search.add_argument("--limit", type=int, metavar="N")
+    search.add_argument("--offline", action="store_true", help="use the local snapshot, no request")
+
+    imp = sub.add_parser("import", help="add tips from a CSV (content,ddl,group_id) or JSONL file")
+    imp.add_argument("file")
+    imp.add_argument("--as", dest="file_format", choices=("csv", "jsonl"),
+                     help="file format (default: from the extension)")
+    imp.add_argument("--group", type=int, metavar="GID", help="put every tip into this group")
+    imp.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="parallel uploads")
+    imp.add_argument("--retries", type=int, default=bulk.DEFAULT_RETRIES)
+    imp.add_argument("--dry-run", action="store_true", help="only validate the file")
+
+    exp = sub.add_parser("export", help="write tips as JSONL or CSV")
+    exp.add_argument("--as", dest="file_format", choices=("jsonl", "csv"), default="jsonl")
+    exp.add_argument("-o", "--output", help="file to write (default: stdout)")
+    scope = exp.add_mutually_exclusive_group()
+    scope.add_argument("--private", action="store_true", help="only private tips")
+    scope.add_argument("--group", type=int, metavar="GID", help="only tips of this group")
+    exp.add_argument("--offline", action="store_true", help="use the local snapshot, no request")
+
+    # 子命令后面也接受 --format (tips ls --format tsv)
+    for p in sub.choices.values():
+        p.add_argument("--format", choices=("json", "tsv"), default=argparse.SUPPRESS)
+    return parser
+
+
+# =============================================================================
+# 输出
+# =============================================================================
+
+def _tsv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        value = ",".join(str(v) for v in value)
+    elif isinstance(value, bool):
+        value = "1" if value else "0"
+    return str(value).replace("\t", " ").replace("\n", " ")
+
+
+def _emit_rows(rows, fields, fmt, out=sys.stdout):
+    if fmt == "json":
+        json.dump(rows, out, ensure_ascii=False)
+        out.write("\n")
+        return
+    out.write("\t".join(fields) + "\n")
+    for row in rows:
+        out.write("\t".join(_tsv_cell(row.get(f)) for f in fields) + "\n")
+
+
+def _emit_result(msg, ok, fmt, out=sys.stdout):
+    if fmt == "json":
+        json.dump({"ok": ok, "message": msg}, out, ensure_ascii=False)
+        out.write("\n")
+    else:
+        out.write(f"{'ok' if ok else 'error'}\t{_tsv_cell(msg)}\n")
+    return 0 if ok else 1
+
+
+# =============================================================================
+# 命令
+# =============================================================================
+
+def _sync(client, offline=False):
+    """Local snapshot + one delta fetch (full fetch when there is no snapshot)"""
+    has_snapshot, _ = client.load_local_state()
+    if offline:
+        return ("Offline", True) if has_snapshot else ("No local snapshot", False)
+    return client.fetch_tips()
+
+
+def cmd_ls(client, args):
+    msg, ok = _sync(client, args.offline)
+    if not ok:
+        return _emit_result(msg, ok, args.format)
+
+    _emit_rows([tip.to_dict() for tip in _scoped(client, args)], TIP_FIELDS, args.format)
+    return 0
+
+
+def _scoped(client, args):
+    """--private / --group GID / everything"""
+    cache = client.local_cache
+    if args.private:
+        return cache.of_type(PRIVATE)
+    if args.group is not None:
+        return cache.in_group(args.group)
+    return cache
+
+
+def _write_result(client, msg, ok, fmt):
+    """写成功后把改动写进本地快照 (和 TUI 一样只写变了的 tip)，`ls --offline` 马上能看到"""
+    if ok:
+        client.save_local_state()
+    return _emit_result(msg, ok, fmt)
+
+
+def cmd_add(client, args):
+    # 不用 reconcile：快照里先放占位 tip，下次同步换成真实数据
+    client.load_local_state()
+    msg, ok = client.add_tip(args.content, args.ddl, args.group)
+    return _write_result(client, msg, ok, args.format)
+
+
+def cmd_state(client, args):
+    """done / undone: only flip the tips that are not already in the wanted state"""
+    msg, ok = _sync(client)
+    if not ok:
+        return _emit_result(msg, ok, args.format)
+
+    want_done = args.command == "done"
+    indexes = []
+    for idx in client._parse_indexes(args.indexes):
+        tip = client.local_cache.by_index(idx)
+        if tip is not None and tip.is_done != want_done:
+            indexes.append(str(idx))
+    if not indexes:
+        return _emit_result("Nothing to change.", True, args.format)
+    msg, ok = client.change_tip_state(",".join(indexes))
+    return _write_result(client, msg, ok, args.format)
+
+
+def cmd_rm(client, args):
+    msg, ok = _sync(client)
+    if not ok:
+        return _emit_result(msg, ok, args.format)
+    msg, ok = client.delete_tips(args.indexes, args.group)
+    return _write_result(client, msg, ok, args.format)
+
+
+def cmd_groups(client, args):
+    groups, ok = client.list_my_groups()
+    if not ok:
+        return _emit_result("Could not list groups (offline or session expired?)", False, args.format)
+    fields = sorted({key for g in groups for key in g}) if groups else ["id", "name"]
+    _emit_rows(groups, fields, args.format)
+    return 0
+
+
+def cmd_search(client, args):
+    msg, ok = _sync(client, args.offline)
+    if not ok:
+        return _emit_result(msg, ok, args.format)
+    tips, err = client.search(" ".join(args.query), limit=args.limit)
+    if err:
+        return _emit_result(err, False, args.format)
+    _emit_rows([tip.to_dict() for tip in tips], TIP_FIELDS, args.format)
+    return 0
+
+
+def _progress(done, total, failed):
+    sys.stderr.write(f"\r[import] {done}/{total}  failed: {failed}")
+    if done == total:
+        sys.stderr.write("\n")
+    sys.stderr.flush()
+
+
+def _user_path(path):
+    """A path given on the command line, resolved against the caller's directory"""
+    base = os.environ.get("TIPS_CALLER_CWD") or os.getcwd()
+    return os.path.join(base, os.path.expanduser(path))
+
+
+def cmd_import(client, args):
+    try:
+        rows, errors = bulk.validate(bulk.read_rows(_user_path(args.file), args.file_format), args.group)
+    except OSError as e:
+        return _emit_result(f"Cannot read {args.file}: {e}", False, args.format)
+
+    # 先整体校验，有一行不对就一条都不发
+    if errors:
+        for line_no, error in errors:
+            sys.stderr.write(f"{args.file}:{line_no}: {error}\n")
+        return _emit_result(f"{len(errors)} invalid rows, nothing imported.", False, args.format)
+    if args.dry_run:
+        return _emit_result(f"{len(rows)} rows OK.", True, args.format)
+
+    progress = _progress if sys.stderr.isatty() else None
+    added, failures, refresh_msg = bulk.upload(client, rows, args.workers, args.retries, progress)
+    for line_no, error in failures:
+        sys.stderr.write(f"{args.file}:{line_no}: {error}\n")
+    ok = not failures
+    msg = f"Imported {added}/{len(rows)} tips." + ("" if ok else f" {len(failures)} failed.")
+    return _emit_result(f"{msg} {refresh_msg}", ok, args.format)
+
+
+def cmd_export(client, args):
+    msg, ok = _sync(client, args.offline)
+    if not ok:
+        return _emit_result(msg, ok, args.format)
+    tips = _scoped(client, args)
+    if args.output:
+        with open(_user_path(args.output), "w", encoding="utf-8", newline="") as out:
+            count = bulk.export(tips, out, args.file_format)
+        sys.stderr.write(f"Exported {count} tips to {args.output}\n")
+    else:
+        bulk.export(tips, sys.stdout, args.file_format)
+    return 0
+
+
+HANDLERS = {
+    "ls": cmd_ls,
+    "add": cmd_add,
+    "done": cmd_state,
+    "undone": cmd_state,
+    "rm": cmd_rm,
+    "groups": cmd_groups,
+    "search": cmd_search,
+    "import": cmd_import,
+    "export": cmd_export,
+}
+
+
+def run(argv, client=None, profile=None):
+    """Entry point for `tips <command> ...`; returns the process exit code"""
+    args = _parser().parse_args(argv)
+    client = client or TipsClient(profile=profile)
+    try:
+        user = client.current_user or client.load_session_file()
+    except Exception:
+        user = None
+    if not user:
+        sys.stderr.write("Not logged in. Run `tips` once to log in.\n")
+        return 2
+    return HANDLERS[args.command](client, args)
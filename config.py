@@ -1,4 +1,74 @@
 # config.py
 SERVER_URL = "https://tips.quam1123.top"
 
-LOGIN_SESSION_CACHE_PATH = "./.session_cache"
\ No newline at end of file
+LOGIN_SESSION_CACHE_PATH = "./.session_cache"
+
+# 本地 tips 快照 (SQLite)，和 session 缓存放在一起
+TIP_STORE_PATH = "./.tips_store.db"
+
+# 服务器 RSA 公钥缓存 (按 SERVER_URL 区分)，过期后重新拉取
+PUBLIC_KEY_CACHE_PATH = "./.key_cache"
+PUBLIC_KEY_TTL = 7 * 24 * 3600
+
+# 后台同步：无变化时间隔翻倍，有变化回到最小值 (秒)
+SYNC_MIN_INTERVAL = 5
+SYNC_MAX_INTERVAL = 120
+# 后端支持长轮询时，每个请求最多挂起多久 (秒)
+SYNC_LONG_POLL_WAIT = 25
+
+# HTTP 传输层 (core/transport.py)
+# 连接池：每个 host 最多保持的连接数 (批量导入、并发查群信息会同时用到多个)
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+# (connect, read) 超时，按路径前缀匹配，最长的前缀优先
+HTTP_TIMEOUTS = {
+    "default": (3.05, 10),
+    "/public_key/": (3.05, 5),
+    "/login": (3.05, 15),
+    "/show_tips/": (3.05, 30),
+}
+# 长轮询请求的 read 超时 = wait + 这个余量
+HTTP_LONG_POLL_MARGIN = 10
+# 只对幂等请求 (GET/HEAD) 重试；退避 = 随机 [0, base * 2^n] 秒
+HTTP_READ_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.3
+# 熔断：连续失败这么多次后直接失败 (界面用本地缓存)，过一段时间再放一个请求试探
+BREAKER_FAILURES = 5
+BREAKER_RESET = 30
+# 压缩：Accept-Encoding 按 urllib3 能解的来 (gzip/deflate，装了 brotli / zstandard 再加 br / zstd)
+# /show_tips/ 边下载边解析成 Tip，不在内存里同时留整个 body 和整个 JSON (装了 ijson 会用它)
+FETCH_STREAMING = True
+FETCH_CHUNK_SIZE = 64 * 1024
+
+# 离线写队列：后端连不上时 a/d/c 先记到这里，恢复后合并、按顺序重放
+WRITE_JOURNAL_PATH = "./.write_journal.jsonl"
+
+# 群组元数据缓存 (core/groups.py)：LRU 上限 + 每类条目自己的 TTL (秒)
+GROUP_CACHE_SIZE = 256
+GROUP_LIST_TTL = 300          # /groups/my
+GROUP_MEMBERS_TTL = 120       # /groups/{id}/info
+GROUP_NAME_TTL = 24 * 3600    # 群名几乎不变
+
+# 切换群组：只用本地数据；上次同步比这更旧 (秒) 才在后台做一次新鲜度检查
+GROUP_FRESH_AFTER = 5
+# 启动后在后台预取成员列表的群组个数上限
+GROUP_PREFETCH_MAX = 20
+
+# 多账号 / 多服务器 (core/profiles.py)：default 用上面这些路径，
+# 其它 profile 的 session / 快照 / 公钥 / 写队列各自放在 PROFILE_DIR/<name>/ 下
+DEFAULT_PROFILE = "default"
+PROFILES = {
+    "default": {"server_url": SERVER_URL},
+}
+# 可选：本地再加 profile，不用改代码 {"staging": {"server_url": "https://..."}}
+PROFILES_FILE = "./.profiles.json"
+PROFILE_DIR = "./.profiles"
+
+# 截止提醒 (core/reminders.py)：ddl 前这些时间各提醒一次 (秒)
+REMINDER_OFFSETS = (24 * 3600, 3600, 10 * 60)
+# 提醒时响终端铃
+REMINDER_BELL = True
+# 桌面通知钩子：命令后面会追加 标题 和 内容 两个参数，例如 "notify-send"；None 不用
+REMINDER_NOTIFY_CMD = None
+# 提醒线程最长睡多久 (秒)，系统休眠或改时间后也能及时醒来
+REMINDER_MAX_SLEEP = 60
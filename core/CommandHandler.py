@@ -1,23 +1,140 @@
 # core/handler.py (新建)
 import sys
+import queue
+import asyncio
+import readline
+import threading
 from ui import style
 from core.client import TipsClient
+from core.async_client import AsyncTipsClient
+from core.profiles import ProfileSessions
+from core.reminders import ReminderScheduler, format_left, desktop_notify
+from core import profiler
+from config import REMINDER_BELL, REMINDER_NOTIFY_CMD
+
+PROMPT = " > "
 
 class CommandHandler:
-    def __init__(self, client : TipsClient, renderer):
+    def __init__(self, client : TipsClient, renderer, aclient : AsyncTipsClient | None = None,
+                 sessions : ProfileSessions | None = None):
         self.client = client
         self.renderer = renderer
+        self.aclient = aclient or AsyncTipsClient(client)
+        # 所有打开过的 profile (切换时复用它们的 client)
+        self.sessions = sessions or ProfileSessions(client.profile.name)
+        if not self.sessions.is_open(client.profile.name):
+            self.sessions.add(client.profile.name, client, self.aclient)
         self.status_msg = f"Welcome {client.current_user}!"
 
+        # 后台线程也会重绘，画面和提示符要串行化
+        self._ui_lock = threading.Lock()
+        self.waiting_input = False
+
+        # 截止提醒 (start_reminders 之后才有)
+        self.reminders = None
+
+        # 待提交的写操作 (见 _submit)
+        self._writes = queue.Queue()
+        self._write_thread = None
+
     def refresh_ui(self):
         self.renderer.draw_main_ui(self.client, self.status_msg)
 
+    def read_command(self):
+        """画界面 + 读一条命令 (提示符在锁里写出，后台重绘时可以原样补回)"""
+        with self._ui_lock:
+            self.refresh_ui()
+            sys.stdout.write(PROMPT)
+            sys.stdout.flush()
+            self.waiting_input = True
+        try:
+            return input()
+        finally:
+            self.waiting_input = False
+
+    def start_background_sync(self, immediate=False):
+        """
+        启动 client 的后台同步线程；只有数据真的变了才重绘。
+        immediate=True: 先显示本地快照，马上在后台和服务器对账。
+        """
+        self.client.start_sync(self._on_sync, immediate)
+
+    def prefetch_groups(self):
+        """后台预取群组列表和各群成员，enter / get_group_info 直接用缓存"""
+        threading.Thread(
+            target=lambda: asyncio.run(self.aclient.prefetch_groups(self.client.current_group_id)),
+            name="tips-prefetch", daemon=True,
+        ).start()
+
+    def start_reminders(self):
+        """截止提醒跟着当前 client 的缓存走 (切换 profile 时重新挂)"""
+        self.stop_reminders()
+        self.reminders = ReminderScheduler(self.client.local_cache, self._on_reminders).start()
+
+    def stop_reminders(self):
+        if self.reminders is not None:
+            self.reminders.stop()
+            self.reminders = None
+
+    def _on_reminders(self, alerts):
+        # 同时到期的合成一条：状态栏、一声铃、一条桌面通知
+        alerts.sort(key=lambda alert: alert[1])
+        lines = [f"#{tip.index} {tip.content} ({format_left(left)})" for tip, left in alerts]
+        more = f" +{len(lines) - 3} more" if len(lines) > 3 else ""
+        self.status_msg = "⏰ Due soon: " + "; ".join(lines[:3]) + more
+        if REMINDER_NOTIFY_CMD:
+            desktop_notify(REMINDER_NOTIFY_CMD, f"Tips: {len(lines)} due soon", "\n".join(lines))
+        if REMINDER_BELL:
+            with self._ui_lock:
+                sys.stdout.write(style.Term.BELL)
+                sys.stdout.flush()
+        self._redraw_if_idle()
+
+    def _on_sync(self, msg):
+        self.status_msg = msg
+        self._redraw_if_idle()
+
+    def _redraw_if_idle(self):
+        with self._ui_lock:
+            # 用户正停在主提示符时才重绘，输入到一半的内容补回去
+            if self.waiting_input:
+                self.refresh_ui()
+                sys.stdout.write(PROMPT + readline.get_line_buffer())
+                sys.stdout.flush()
+
+    # --- 乐观更新：本地先改、马上重绘，请求排队在后台发 ---
+
+    def _submit(self, staged):
+        mutation, err = staged
+        if mutation is None:
+            self.status_msg = err
+            return
+        self.status_msg = "Saving..."
+        if self._write_thread is None:
+            self._write_thread = threading.Thread(target=self._write_loop, daemon=True)
+            self._write_thread.start()
+        # 带上当时的 client：排队期间切换 profile，也要发给原来的服务器
+        self._writes.put((self.client, mutation))
+
+    def _write_loop(self):
+        # 单线程按顺序提交，保证 "先改状态再删除" 这类操作不乱序
+        while True:
+            client, mutation = self._writes.get()
+            with profiler.span(f"cmd:write {mutation.path}"):
+                msg, ok = client.commit(mutation)
+                if ok:
+                    client.reconcile(mutation)
+            if ok:
+                self.status_msg = msg
+            else:
+                self.status_msg = f"{msg} (reverted)"
+            self._redraw_if_idle()
+
     # --- 基础命令处理函数 ---
     
     def refresh(self):
-        self.status_msg = "Refreshing..."
-        self.refresh_ui() 
-        msg, _ = self.client.fetch_tips()
+        # 交给后台线程，不阻塞提示符
+        msg, _ = self.client.request_sync()
         self.status_msg = msg
 
     def add_tip(self):
@@ -26,21 +143,52 @@ class CommandHandler:
         d = input("   DDL (YY-MM-DD HH:MM): ")
         g = input("   Group ID (leave empty for Private): ").strip()
         group_id = int(g) if g.isdigit() else None
-        msg, refresh = self.client.add_tip(c, d, group_id)
-        self.status_msg = msg
-        if refresh: self.client.fetch_tips()
+        self._submit(self.client.stage_add_tip(c, d, group_id))
 
     def delete_tip(self):
         idx = input("\n[Delete] Indexes (e.g. 1,2): ")
-        msg, refresh = self.client.delete_tips(idx)
-        self.status_msg = msg
-        if refresh: self.client.fetch_tips()
+        self._submit(self.client.stage_delete_tips(idx))
 
     def change_state(self):
         idx = input("\n[Change State] Indexes (e.g. 1,2): ")
-        msg, refresh = self.client.change_tip_state(idx)
-        self.status_msg = msg
-        if refresh: self.client.fetch_tips()
+        self._submit(self.client.stage_change_tip_state(idx))
+
+    # --- 搜索 ---
+
+    def search_tips(self):
+        text = input("\n[Query] e.g. 周报 due:<24h done:no group:5: ").strip()
+        if not text:
+            self.status_msg = "Empty query."
+            return
+        tips, err = self.client.search(text)
+        if err:
+            self.status_msg = err
+            return
+        # 和 list_groups 一样暂时切出 TUI 显示结果
+        sys.stdout.write(style.Term.ALT_SCREEN_OFF)
+        print(f"\n--- {len(tips)} tips match '{text}' ---")
+        for tip in tips:
+            mark = "x" if tip.is_done else " "
+            where = f"G{tip.group_id}" if tip.is_group else "P"
+            print(f"[{mark}] {tip.index:>5} | {where:<5} | {tip.ddl or '-':<14} | {tip.content}")
+        input("\nPress Enter to return...")
+        sys.stdout.write(style.Term.ALT_SCREEN_ON)
+        self.renderer.invalidate()
+        self.status_msg = f"{len(tips)} tips match '{text}'."
+
+    # --- 翻页 ---
+
+    def page_private_next(self):
+        self.renderer.scroll("private", 1)
+
+    def page_private_prev(self):
+        self.renderer.scroll("private", -1)
+
+    def page_group_next(self):
+        self.renderer.scroll("group", 1)
+
+    def page_group_prev(self):
+        self.renderer.scroll("group", -1)
 
     # --- 群组命令 ---
 
@@ -65,6 +213,7 @@ class CommandHandler:
             print(f"ID: {g['id']} | Name: {g['name']} | Role: {g['role']} | Code: {g['invite_code']}")
         input("\nPress Enter to return...")
         sys.stdout.write(style.Term.ALT_SCREEN_ON)
+        self.renderer.invalidate()
         self.status_msg = "Group list checked."
 
     def set_group_admin(self):
@@ -75,14 +224,61 @@ class CommandHandler:
 
     def enter_group(self):
         gid = input("   > Group ID to enter: ").strip()
-        msg, refresh = self.client.enter_group(gid)
+        msg, stale = self.client.enter_group(gid)
         self.status_msg = msg
-        if refresh: self.client.fetch_tips()
+        # 本地已切换；数据可能旧了才让后台线程检查一次，不阻塞提示符
+        if stale: self.client.request_sync()
+
+    # --- 多账号 / 多服务器 ---
+
+    def switch_profile(self):
+        name = input(f"   > Profile ({', '.join(self.sessions.names())}): ").strip()
+        if not name or name == self.sessions.active:
+            self.status_msg = f"Profile: {self.sessions.active}"
+            return
+        first_use = not self.sessions.is_open(name)
+        try:
+            client, aclient = self.sessions.get(name)
+        except ValueError as e:
+            self.status_msg = str(e)
+            return
+
+        if client.current_user is None:
+            # 这个 profile 在本进程里还没登录过：切出 TUI 走登录流程
+            import login
+            sys.stdout.write(style.Term.ALT_SCREEN_OFF)
+            try:
+                ok = login.login(client, aclient)
+            finally:
+                sys.stdout.write(style.Term.ALT_SCREEN_ON)
+                self.renderer.invalidate()
+            if not ok:
+                self.status_msg = f"Profile {name}: not logged in."
+                return
+
+        # 旧 profile 的连接池和缓存都留着，只停掉它的后台同步和提醒
+        with self._ui_lock:
+            self.client.stop_sync()
+            self.client, self.aclient = client, aclient
+            self.sessions.active = name
+            self.renderer.reset_view()
+        self.start_reminders()
+        # 切回来的 profile 缓存是热的，马上在后台补一次 delta
+        self.start_background_sync(immediate=not first_use)
+        if first_use:
+            self.prefetch_groups()
+        self.status_msg = f"Switched to profile {name} ({client.current_user} @ {client.server_url})."
 
     def get_group_info(self):
-        gid = input("   > Group ID to show info: ").strip()
-        msg, _ = self.client.get_group_info(gid)
-        self.status_msg = msg
+        raw = input("   > Group ID(s) to show info (e.g. 1,2): ").strip()
+        gids = [g.strip() for g in raw.split(',') if g.strip()]
+        if len(gids) <= 1:
+            msg, _ = self.client.get_group_info(raw)
+            self.status_msg = msg
+            return
+        # 多个群组并发查询
+        infos = asyncio.run(self.aclient.get_group_infos(gids))
+        self.status_msg = "\n".join(f"Group {gid}: {msg}" for gid, (msg, _) in infos.items())
     
     def get_my_group(self):
         msg, _ = self.client.list_my_groups()
@@ -96,6 +292,9 @@ Available Commands:
     d                 : 删除tips
     c                 : 修改tips状态（完成/未完成）
     r                 : 刷新界面
+    pn / pp           : 私人便签 下一页 / 上一页
+    gn / gp           : 群组便签 下一页 / 上一页
+    /query            : 搜索tips（关键词 + done:no / group:5 / due:<24h）
     q                 : 退出程序
     create_group      : 创造一个新群组
     join_group        : 加入一个群组
@@ -103,10 +302,12 @@ Available Commands:
     get_my_group      : 列出我加入的所有群组
     set_group_admin   : 设置管理员（需要你是群主）
     enter             : 切换到某个群组
+    profile           : 切换账号 / 服务器 (见 config.PROFILES、.profiles.json)
 """
         sys.stdout.write(style.Term.ALT_SCREEN_OFF)
         print(help_text)
         input("Press Enter to return...")
         sys.stdout.write(style.Term.ALT_SCREEN_ON)
+        self.renderer.invalidate()
         self.status_msg = "Help displayed."
 
@@ -0,0 +1,130 @@
+# core/async_client.py
+"""
+异步版 TipsClient (asyncio front-end over the blocking client)
+
+Every call runs the matching TipsClient method on a small thread pool, so
+independent requests overlap instead of queueing behind each other:
+
+    aclient = AsyncTipsClient(client)
+    ok, msg = asyncio.run(aclient.auto_login())           # /show_tips/ + /groups/my together
+    infos = asyncio.run(aclient.get_group_infos([1, 2]))  # both lookups in flight at once
+
+The sync TipsClient stays the single source of state (session, cache, context).
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from config import GROUP_PREFETCH_MAX
+from core.cache import group_key
+from core.client import TipsClient
+from core import profiler
+
+
+class AsyncTipsClient:
+    def __init__(self, client: TipsClient | None = None, max_workers=8):
+        self.client = client or TipsClient()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tips-io")
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    # === 组合调用 ===
+    async def warm_up(self):
+        """
+        /show_tips/ (delta when a snapshot is loaded) and /groups/my in parallel.
+        Returns fetch_tips' (msg, ok); the group list just lands in client.groups.
+        """
+        c = self.client
+        with profiler.span("startup.warm_up"):
+            fetched, _ = await asyncio.gather(
+                self._run(c.fetch_tips), self._run(c.list_my_groups), return_exceptions=True)
+        if isinstance(fetched, Exception):
+            return f"Network Error: {fetched}", False
+        return fetched
+
+    async def auto_login(self, has_snapshot=False):
+        """
+        Cached-session start in one round trip: the session is not validated on
+        its own, the first /show_tips/ is sent optimistically (401 -> expired)
+        while /groups/my preloads group metadata (see warm_up).
+        With a local snapshot a network failure still lets the user in offline.
+        """
+        c = self.client
+        if c.current_user is None:
+            try:
+                if c.load_session_file() is None:
+                    return False, "No session file"
+            except Exception as e:
+                c.forget_session()
+                return False, f"Auto login error: {e}"
+
+        msg, ok = await self.warm_up()
+        if c.session_expired:
+            # forget_session 会连同已载入的快照一起丢掉
+            c.forget_session()
+            return False, "Session expired"
+        if ok:
+            return True, f"Auto login as {c.current_user}"
+        if has_snapshot:
+            return True, f"Offline as {c.current_user}: {msg}"
+        return False, msg
+
+    async def prefetch_groups(self, first=None, limit=GROUP_PREFETCH_MAX):
+        """
+        Warm the group cache: /groups/my, then the members of each group (`first`
+        before the others) in parallel, so `enter` / get_group_info answer locally.
+        Returns how many groups were prefetched.
+        """
+        groups, ok = await self._run(self.client.list_my_groups)
+        if not ok:
+            return 0
+        gids = [g['id'] for g in groups if g.get('id') is not None]
+        if first is not None:
+            gids.sort(key=lambda gid: group_key(gid) != group_key(first))
+        gids = gids[:limit]
+        await self.get_group_infos(gids)
+        return len(gids)
+
+    async def get_group_infos(self, group_ids):
+        """get_group_info for several groups at once -> {group_id: (result, ok)}"""
+        results = await asyncio.gather(*(self._run(self.client.get_group_info, gid) for gid in group_ids))
+        return dict(zip(group_ids, results))
+
+    # === 单个调用 (与 TipsClient 同名同返回值) ===
+    async def login(self, username, password):
+        return await self._run(self.client.login, username, password)
+
+    async def fetch_tips(self, full=False):
+        return await self._run(self.client.fetch_tips, full)
+
+    async def add_tip(self, content, ddl, group_id=None):
+        return await self._run(self.client.add_tip, content, ddl, group_id)
+
+    async def delete_tips(self, input_str, group_id=None):
+        return await self._run(self.client.delete_tips, input_str, group_id)
+
+    async def change_tip_state(self, input_str):
+        return await self._run(self.client.change_tip_state, input_str)
+
+    async def create_group(self, name):
+        return await self._run(self.client.create_group, name)
+
+    async def join_group(self, invite_code):
+        return await self._run(self.client.join_group, invite_code)
+
+    async def list_my_groups(self):
+        return await self._run(self.client.list_my_groups)
+
+    async def get_group_info(self, group_id):
+        return await self._run(self.client.get_group_info, group_id)
+
+    async def set_group_admin(self, group_id, user_ids):
+        return await self._run(self.client.set_group_admin, group_id, user_ids)
+
+    async def enter_group(self, group_id):
+        return await self._run(self.client.enter_group, group_id)
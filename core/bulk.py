@@ -0,0 +1,201 @@
+# core/bulk.py
+"""
+批量导入 / 导出 (Bulk import and export of tips)
+
+Import:
+  1. read_rows()  - CSV (header: content,ddl,group_id) or JSONL, one tip per row
+  2. validate()   - every row is checked before anything is sent; deadlines in
+                    any format the client can parse are normalised to YY-MM-DD HH:MM
+  3. upload()     - /add_tip/ requests go out through a bounded thread pool,
+                    failures where the tip surely was not added (connection
+                    refused / connect timeout, 429, 503) are retried with backoff;
+                    the cache is refreshed once at the end, not per tip
+
+Export streams the cache one tip at a time (CSV or JSONL), so the only full
+copy in memory is the cache itself.
+"""
+import csv
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from core.deadline import parse_ddl
+from core.transport import CircuitOpenError
+
+DDL_FORMAT = "%y-%m-%d %H:%M"
+
+EXPORT_FIELDS = ("index", "real_id", "type", "group_id", "group_name", "content",
+                 "ddl", "is_done", "owner", "completed_members")
+
+DEFAULT_WORKERS = 8
+DEFAULT_RETRIES = 3
+# /add_tip/ 不是幂等的：只重试服务器肯定没处理的状态码 (500/502/504 可能已经加上了)
+RETRY_STATUS = {429, 503}
+
+
+class ImportRow:
+    __slots__ = ("line", "content", "ddl", "group_id")
+
+    def __init__(self, line, content, ddl, group_id):
+        self.line = line
+        self.content = content
+        self.ddl = ddl
+        self.group_id = group_id
+
+    def payload(self):
+        return {"content": self.content, "ddl": self.ddl or None, "group_id": self.group_id}
+
+
+def _file_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_rows(path, fmt=None):
+    """Yield (line_no, dict) from a CSV or JSONL file; bad JSON lines yield (line_no, None)"""
+    fmt = _file_format(path, fmt)
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            # 表头算第 1 行
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
+            return
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_no, row if isinstance(row, dict) else None
+
+
+def normalize_ddl(raw):
+    """'' / None -> '', parseable deadline -> 'YY-MM-DD HH:MM', otherwise None"""
+    raw = (raw or "").strip()
+    if not raw:
+        return ""
+    try:
+        datetime.strptime(raw, DDL_FORMAT)
+        return raw
+    except ValueError:
+        pass
+    dt = parse_ddl(raw)
+    return dt.strftime(DDL_FORMAT) if dt is not None else None
+
+
+def validate(rows, group_id=None):
+    """
+    Check every row up front. Returns (valid ImportRows, [(line_no, error)]).
+    `group_id` overrides the per-row group_id column.
+    """
+    valid, errors = [], []
+    for line_no, row in rows:
+        if row is None:
+            errors.append((line_no, "not a JSON object"))
+            continue
+        content = str(row.get("content") or "").strip()
+        if not content:
+            errors.append((line_no, "empty content"))
+            continue
+        ddl = normalize_ddl(row.get("ddl"))
+        if ddl is None:
+            errors.append((line_no, f"invalid ddl: {row.get('ddl')!r}"))
+            continue
+
+        gid = group_id
+        if gid is None:
+            raw_gid = row.get("group_id")
+            if raw_gid not in (None, ""):
+                try:
+                    gid = int(raw_gid)
+                except (TypeError, ValueError):
+                    errors.append((line_no, f"invalid group_id: {raw_gid!r}"))
+                    continue
+        valid.append(ImportRow(line_no, content, ddl, gid))
+    return valid, errors
+
+
+def _never_sent(exc):
+    """Did the request fail before reaching the server? (only then is a retry safe)"""
+    if isinstance(exc, (requests.ConnectTimeout, CircuitOpenError)):
+        return True
+    if not isinstance(exc, requests.ConnectionError):
+        return False
+    # 连接被拒绝；连接中途断开 (请求可能已经处理了) 不算
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def _post_with_retry(client, row, retries):
+    """One /add_tip/ with retries; returns (ok, error message)"""
+    delay = 0.5
+    for attempt in range(retries + 1):
+        try:
+            resp = client.session.post(f"{client.server_url}/add_tip/", json=row.payload())
+            if resp.status_code == 200:
+                return True, None
+            error = f"HTTP {resp.status_code}"
+            if resp.status_code not in RETRY_STATUS:
+                return False, error
+        except Exception as e:
+            error = str(e)
+            # 读超时之类：tip 可能已经加上了，重发会出现重复
+            if not _never_sent(e):
+                return False, error
+        if attempt < retries:
+            time.sleep(delay + random.uniform(0, delay))
+            delay *= 2
+    return False, error
+
+
+def upload(client, rows, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, progress=None):
+    """
+    Add `rows` concurrently (at most `workers` requests in flight), then refresh
+    the cache once. `progress(done, total, failed)` is called after every row.
+    Returns (added, [(line_no, error)], refresh_msg).
+    """
+    total = len(rows)
+    added, failures = 0, []
+    if rows:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(_post_with_retry, client, row, retries): row for row in rows}
+            for done, future in enumerate(as_completed(futures), start=1):
+                ok, error = future.result()
+                if ok:
+                    added += 1
+                else:
+                    failures.append((futures[future].line, error))
+                if progress:
+                    progress(done, total, len(failures))
+
+    # 全部发完只同步一次
+    msg, _ = client.fetch_tips()
+    failures.sort()
+    return added, failures, msg
+
+
+def export(tips, out, fmt="jsonl"):
+    """Write tips one by one to the text stream `out`; returns how many were written"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(EXPORT_FIELDS)
+        for tip in tips:
+            data = tip.to_dict()
+            data["completed_members"] = ",".join(map(str, data["completed_members"]))
+            writer.writerow(["" if data.get(f) is None else data.get(f) for f in EXPORT_FIELDS])
+            count += 1
+        return count
+
+    for tip in tips:
+        out.write(json.dumps(tip.to_dict(), ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
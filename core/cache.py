@@ -0,0 +1,232 @@
+# core/cache.py
+"""
+带索引的 tips 缓存 (Indexed tip cache)
+
+Replaces the plain local_cache list. Tips are kept in dicts keyed by display
+`index` and by `real_id`, plus sorted index lists per group and per type, so
+lookups are O(1) and panel partitioning is O(k) instead of a scan per redraw.
+Iterating the cache still yields the tips (core.tip.Tip) in `index` order.
+"""
+import threading
+from bisect import bisect_left, insort
+from core.tip import GROUP
+
+
+def group_key(group_id):
+    """后端有时给 int 有时给 str，统一成 int 作为索引键"""
+    if group_id is None:
+        return None
+    try:
+        return int(group_id)
+    except (TypeError, ValueError):
+        return group_id
+
+
+class TipCache:
+    def __init__(self, items=()):
+        self._lock = threading.RLock()
+        self._listeners = []
+        # 每次变更 +1，渲染层据此判断要不要重画面板
+        self.version = 0
+        self._reset_indexes()
+        if items:
+            self.replace(items)
+
+    def _reset_indexes(self):
+        self._by_index = {}     # index -> tip
+        self._by_real_id = {}   # real_id -> tip
+        self._order = []        # all indexes, sorted
+        self._by_group = {}     # group_id -> sorted indexes
+        self._by_type = {}      # 'PRIVATE' / 'GROUP' -> sorted indexes
+
+    # === 变更通知 ===
+    def add_listener(self, fn):
+        """fn(changed, removed, reset) is called after every mutation"""
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, changed, removed, reset=False):
+        self.version += 1
+        for fn in list(self._listeners):
+            fn(changed, removed, reset)
+
+    # === 索引维护 ===
+    def _link(self, item):
+        idx = item.index
+        self._by_index[idx] = item
+        if item.real_id is not None:
+            self._by_real_id[item.real_id] = item
+        insort(self._order, idx)
+        insort(self._by_type.setdefault(item.type, []), idx)
+        if item.type == GROUP:
+            insort(self._by_group.setdefault(group_key(item.group_id), []), idx)
+
+    def _unlink(self, item):
+        idx = item.index
+        self._by_index.pop(idx, None)
+        if item.real_id is not None:
+            self._by_real_id.pop(item.real_id, None)
+        _discard_sorted(self._order, idx)
+        _discard_sorted(self._by_type.get(item.type, []), idx)
+        if item.type == GROUP:
+            gk = group_key(item.group_id)
+            bucket = self._by_group.get(gk)
+            if bucket is not None:
+                _discard_sorted(bucket, idx)
+                if not bucket:
+                    del self._by_group[gk]
+
+    # === 写操作 ===
+    def replace(self, items):
+        """
+        Make the cache hold exactly `items` (used after a full /show_tips/ reload).
+        Diffed against what is cached: a reload that changes nothing does not
+        notify or bump `version`, a small difference is applied and announced
+        like a delta, and only a mostly new set is a full rebuild (reset=True).
+        """
+        items = sorted(items, key=lambda x: x.index)
+        with self._lock:
+            old = self._by_index
+            fresh = {item.index for item in items}
+            changed = []
+            for item in items:
+                cur = old.get(item.index)
+                if cur is None or not cur.same_as(item):
+                    changed.append(item)
+            removed = [cur for idx, cur in old.items() if idx not in fresh]
+            if not changed and not removed:
+                return
+            rebuild = len(changed) + len(removed) > len(old) // 2
+            if rebuild:
+                self._reset_indexes()
+                for item in items:
+                    self._link(item)
+            else:
+                # 先全部摘掉再挂上：换了下标的 tip 的 real_id 索引不会被误删
+                for item in changed:
+                    cur = old.get(item.index)
+                    if cur is not None:
+                        self._unlink(cur)
+                for cur in removed:
+                    self._unlink(cur)
+                for item in changed:
+                    self._link(item)
+        if rebuild:
+            self._notify(items, [], reset=True)
+        else:
+            self._notify(changed, removed)
+
+    def upsert(self, item):
+        """Insert or replace a tip, matched by real_id first and then by index"""
+        self.apply([item], [])
+
+    def remove(self, real_id):
+        removed = self.apply([], [real_id])
+        return removed[0] if removed else None
+
+    def apply(self, changed, removed_ids):
+        """
+        Apply a batch of upserts and deletions; returns the removed tips.
+        A tip displaced from its index by another one (the backend renumbered)
+        moves to the end; listeners see that as removed + changed.
+        """
+        removed, displaced = [], []
+        with self._lock:
+            for item in changed:
+                old = None
+                if item.real_id is not None:
+                    old = self._by_real_id.get(item.real_id)
+                if old is None:
+                    old = self._by_index.get(item.index)
+                if old is not None:
+                    self._unlink(old)
+                # 新下标可能被别的 tip 占着 (后端重新编号)：挪到最后，它自己的更新稍后会到
+                clash = self._by_index.get(item.index)
+                if clash is not None:
+                    self._unlink(clash)
+                self._link(item)
+                if clash is not None:
+                    copy = clash.copy(index=self._order[-1] + 1)
+                    displaced.append((clash, copy))
+                    self._link(copy)
+            for real_id in removed_ids:
+                old = self._by_real_id.get(real_id)
+                if old is not None:
+                    self._unlink(old)
+                    removed.append(old)
+            # 挪过位置、又被同一批里自己的更新或删除替换掉的不用再通知
+            moved = [copy for _, copy in displaced if self._by_index.get(copy.index) is copy]
+            displaced = [clash for clash, _ in displaced]
+        if changed or removed or displaced:
+            self._notify(list(changed) + moved, removed + displaced)
+        return removed
+
+    def discard(self, item):
+        """Remove exactly this object (e.g. an optimistic placeholder) if it is still cached"""
+        with self._lock:
+            if self._by_index.get(item.index) is not item:
+                return False
+            self._unlink(item)
+        self._notify([], [item])
+        return True
+
+    # === 读操作 ===
+    def max_index(self):
+        with self._lock:
+            return self._order[-1] if self._order else 0
+
+    def by_index(self, idx):
+        return self._by_index.get(idx)
+
+    def by_real_id(self, real_id):
+        return self._by_real_id.get(real_id)
+
+    def in_group(self, group_id, start=0, stop=None):
+        """Group tips of one group, in index order (optionally only [start:stop])"""
+        with self._lock:
+            order = self._by_group.get(group_key(group_id), ())
+            return [self._by_index[i] for i in order[start:stop]]
+
+    def of_type(self, tip_type, start=0, stop=None):
+        """Tips of one type, in index order (optionally only [start:stop])"""
+        with self._lock:
+            order = self._by_type.get(tip_type, ())
+            return [self._by_index[i] for i in order[start:stop]]
+
+    def count_group(self, group_id):
+        return len(self._by_group.get(group_key(group_id), ()))
+
+    def count_type(self, tip_type):
+        return len(self._by_type.get(tip_type, ()))
+
+    def group_ids(self):
+        with self._lock:
+            return list(self._by_group)
+
+    def to_list(self):
+        with self._lock:
+            return [self._by_index[i] for i in self._order]
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __len__(self):
+        return len(self._by_index)
+
+    def __bool__(self):
+        return bool(self._by_index)
+
+    def __getitem__(self, pos):
+        with self._lock:
+            if isinstance(pos, slice):
+                return [self._by_index[i] for i in self._order[pos]]
+            return self._by_index[self._order[pos]]
+
+
+def _discard_sorted(seq, value):
+    pos = bisect_left(seq, value)
+    if pos < len(seq) and seq[pos] == value:
+        del seq[pos]
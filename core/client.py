@@ -1,18 +1,62 @@
-import requests
-from config import SERVER_URL, LOGIN_SESSION_CACHE_PATH
+from config import PUBLIC_KEY_TTL, FETCH_STREAMING, FETCH_CHUNK_SIZE, GROUP_FRESH_AFTER
 from datetime import datetime
-from core.crypto import encrypt_password
+from core.crypto import encrypt_password, get_key_cache
+from core.store import TipStore
+from core.cache import TipCache, group_key
+from core.groups import GroupCache
+from core.tip import Tip, GROUP
+from core.sync import SyncWorker
+from core import profiler
+from core.transport import TransportSession, CircuitOpenError
+from core.jsonstream import iter_object
+from core.journal import WriteJournal, coalesce, temp_id, is_temp_id, ADD
+from core.profiles import get_profile
+from requests import ConnectionError as RequestsConnectionError
 import json
 import os
+import threading
+import time
+
+class Mutation:
+    """一次已应用到 local_cache、还没发给服务器的写操作"""
+    def __init__(self, path, body, ok_msg, fail_msg, error_prefix, undo, placeholders=()):
+        self.path = path
+        self.body = body
+        self.ok_msg = ok_msg
+        self.fail_msg = fail_msg          # resp -> status message
+        self.error_prefix = error_prefix  # prefix for network exceptions
+        self.undo = undo
+        self.placeholders = list(placeholders)
+        self.queued = False               # True: 离线，进了写队列 (core/journal.py)
+
+
+def _cursor_older(cursor, current):
+    """Is `cursor` behind `current`? Cursors are opaque strings; only numeric ones can be ordered"""
+    try:
+        return int(cursor) < int(current)
+    except (TypeError, ValueError):
+        return False
+
 
 class TipsClient:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, server_url=None, profile=None):
+        # profile: 服务器地址 + 这个账号自己的 session / 快照 / 公钥 / 写队列文件 (core/profiles.py)
+        self.profile = profile or get_profile()
+        self.profile.ensure_dir()
+        self.server_url = server_url or self.profile.server_url
+        self.session_path = self.profile.session_path
+        # 连接池 / 超时 / 重试 / 熔断见 core/transport.py；
+        # --profile 时每个 HTTP 请求都记一个 span (关闭时原样返回)
+        self.session = profiler.instrument_session(TransportSession())
+        # 公钥缓存：磁盘 + 内存里的已解析对象
+        self.key_cache = get_key_cache(self.profile.key_cache_path, PUBLIC_KEY_TTL)
         self.current_user = None
         self.current_user_id = None
         
-        # Unified cache for both private and group tips
-        self.local_cache = [] 
+        # Unified cache for both private and group tips (indexed, see core/cache.py)
+        self.local_cache = TipCache()
+        # 倒排索引 (core/search.py)，第一次搜索时才建
+        self._search_index = None
         
         # We need these placeholders so renderer.py doesn't crash
         # (Renderer checks for these if using the split-view logic, 
@@ -20,22 +64,96 @@ class TipsClient:
         self.current_group_id = None
         self.current_group_name = "None"
 
-    def login(self, username, password):
-        try:    
-            resp = self.session.get(f"{SERVER_URL}/public_key/", timeout=5)
-            if resp.status_code != 200: return False, "Server connect error"
-            pem_key = resp.json()['public_key'].encode('utf-8')
-        except Exception as e:
-            return False, f"Network error: {e}"
+        # Delta sync cursor returned by /show_tips/ (None -> next fetch is a full reload)
+        self.sync_cursor = None
+        # 后端在 /show_tips/ 里声明支持长轮询时为 True
+        self.server_long_poll = False
+        # 后台同步线程 (start_sync 之后才有)
+        self.sync_worker = None
+        # group_id -> group_name, persisted with the snapshot (fallback for self.groups)
+        self.group_names = {}
+        # /groups/my、成员、群名的 TTL/LRU 缓存
+        self.groups = GroupCache()
+
+        # 最近一次 /show_tips/ 是否成功 (None: 还没拉过)；401 时 session_expired = True
+        self.last_fetch_ok = None
+        self.session_expired = False
+        # 最近一次同步成功的时间 (time.monotonic())，切换群组时据此决定要不要后台检查
+        self.last_synced = None
+
+        # /show_tips/ 边下载边解析 (见 _read_payload)
+        self.stream_fetch = FETCH_STREAMING
+
+        # 本地快照 (lazy)，启动时先画它，再后台和服务器对账
+        self.store_path = self.profile.store_path
+        self._store = None
+        # 上次写快照之后缓存里变过的 tip: index -> Tip (None = 删了)；
+        # _saved_user 不是当前用户 (或缓存整体重建过) 时整份重写
+        self._dirty = {}
+        self._dirty_lock = threading.Lock()
+        self._saved_user = None
+        # fetch_tips 可能同时在后台线程和主线程里跑
+        self._sync_lock = threading.Lock()
 
-        enc_pwd = encrypt_password(password, pem_key)
+        # 离线写队列：连不上时写操作先落盘，下次同步前合并重放
+        self.journal = WriteJournal(self.profile.journal_path)
+        self.write_conflicts = []       # 最近一次重放被服务器拒绝的写 (状态栏显示)
+        self._replay_lock = threading.Lock()
+        self._inflight = set()          # 已暂存、还在发送中的 add 的临时 id
+        self._temp_ids = set()          # 缓存里所有占位 tip 的临时 id
+        # 已发出的 add：临时 id -> (content, ddl_dt, group)，等服务器的真实 tip 同步回来
+        self._awaiting = {}
+        self._resolved = {}             # 临时 id -> 认出来的真实 id
+        self.local_cache.add_listener(self._match_added)
+        self.local_cache.add_listener(self._track_dirty)
+
+    # === Server Public Key ===
+    def _fetch_public_key_pem(self):
+        resp = self.session.get(f"{self.server_url}/public_key/", timeout=5)
+        if resp.status_code != 200: return None
+        return resp.json()['public_key'].encode('utf-8')
+
+    def _post_encrypted(self, path, password, body):
+        """
+        用（缓存的）服务器公钥加密密码后 POST。
+        If the server cannot decrypt with a cached key it has rotated it: drop
+        the cache entry and retry once with a freshly fetched key. Any other
+        rejection (wrong password, username taken, ...) is returned as is.
+        Returns (response, error_msg).
+        """
+        for _ in range(2):
+            try:
+                public_key, from_cache = self.key_cache.get(self.server_url, self._fetch_public_key_pem)
+                if public_key is None: return None, "Server connect error"
+            except Exception as e:
+                return None, f"Network error: {e}"
+
+            enc_pwd = encrypt_password(password, public_key)
+            resp = self.session.post(f"{self.server_url}{path}", json={**body, "password": enc_pwd})
+            if not from_cache or not self._key_rejected(resp):
+                return resp, None
+            self.key_cache.invalidate(self.server_url)
+        return resp, None
+
+    @staticmethod
+    def _key_rejected(resp):
+        """400 + "decrypt failed": 密码是用旧公钥加密的 (服务器换了密钥)"""
+        if resp.status_code != 400:
+            return False
         try:
-            resp = self.session.post(f"{SERVER_URL}/login/", json={
-                "username": username, "password": enc_pwd
-            })
+            detail = resp.json().get('detail', '')
+        except ValueError:
+            detail = resp.text
+        return 'decrypt' in str(detail).lower()
+
+    def login(self, username, password):
+        try:
+            resp, err = self._post_encrypted("/login/", password, {"username": username})
+            if err: return False, err
             if resp.status_code == 200:
                 self.current_user = username
                 self.current_user_id = resp.json().get("user_id")
+                self.session_expired = False
 
                 self.save_session()
                 return True, "Login Success"
@@ -44,20 +162,12 @@ class TipsClient:
             return False, f"Login Error: {e}"
         
     def sign_up(self, username, password, invite_code):
-        try:    
-            resp = self.session.get(f"{SERVER_URL}/public_key/", timeout=5)
-            if resp.status_code != 200: return False, "Server connect error"
-            pem_key = resp.json()['public_key'].encode('utf-8')
-        except Exception as e:
-            return False, f"Network error: {e}"
-
-        enc_pwd = encrypt_password(password, pem_key)
         try:
-            resp = self.session.post(f"{SERVER_URL}/users/signup/", json={
+            resp, err = self._post_encrypted("/users/signup/", password, {
                 "username": username, 
-                "password": enc_pwd,
                 "invite_code": invite_code
             })
+            if err: return False, err
             if resp.status_code == 200:
                 return True, "Sign Up Success"
             return False, resp.text
@@ -72,186 +182,595 @@ class TipsClient:
                 "user_id" : self.current_user_id,
                 "cookies" : self.session.cookies.get_dict()
             }
-            with open(LOGIN_SESSION_CACHE_PATH, "w") as f:
+            with open(self.session_path, "w") as f:
                 json.dump(data, f)
         except Exception as e:
             print(f"Save session error: {e}")
     
     def clear_session(self):
-        if os.path.exists(LOGIN_SESSION_CACHE_PATH):
-            os.remove(LOGIN_SESSION_CACHE_PATH)
+        if os.path.exists(self.session_path):
+            os.remove(self.session_path)
     
-    def try_auto_login(self):
-        """尝试从本地文件自动登录"""
-        if not os.path.exists(LOGIN_SESSION_CACHE_PATH):
-            return False, "No session file"
-        
+    def forget_session(self):
+        """session 失效：删本地文件，也清掉内存里的登录身份"""
+        self.clear_session()
+        self.current_user = None
+        self.current_user_id = None
+        # 可能已经按这个用户读过快照/预取过，全部作废
+        self.local_cache.replace([])
+        self.sync_cursor = None
+        self._awaiting.clear()
+        self._resolved.clear()
+        self.group_names = {}
+        self.groups.clear()
+        self.current_group_id = None
+        self.current_group_name = "None"
+
+    def load_session_file(self):
+        """
+        读本地 session 文件并装好 cookie（不发请求）。
+        Returns the cached username, or None when there is no session file.
+        """
+        if not os.path.exists(self.session_path):
+            return None
+        with open(self.session_path, "r") as f:
+            data = json.load(f)
+
+        self.session.cookies.update(data.get("cookies", {}))
+        self.current_user = data.get("username")
+        self.current_user_id = data.get("user_id")
+        return self.current_user
+
+    # === Local Snapshot ===
+    def _get_store(self):
+        if self._store is None and self.store_path:
+            try:
+                self._store = TipStore(self.store_path)
+            except Exception:
+                # 本地库打不开就当没有，不影响在线使用
+                self.store_path = None
+        return self._store
+
+    def load_local_state(self):
+        """Fill local_cache from the on-disk snapshot of the current user"""
+        store = self._get_store()
+        if store is None or not self.current_user:
+            return False, "No local snapshot"
         try:
-            with open(LOGIN_SESSION_CACHE_PATH, "r") as f:
-                data = json.load(f)
-                
-            cached_user = data.get("username")
-            cookies = data.get("cookies", {})
-            self.session.cookies.update(cookies)
-            
-            resp = self.session.get(f"{SERVER_URL}/groups/my")
-            
-            if resp.status_code == 200:
-                self.current_user = cached_user
-                self.current_user_id = data.get("user_id")
-                return True, f"Auto login as {cached_user}"
-            else:
-                self.clear_session() 
-                return False, "Session expired"
-                
+            snap = store.load(self.current_user)
         except Exception as e:
-            self.clear_session()
-            return False, f"Auto login error: {e}"
+            return False, f"Local snapshot error: {e}"
+        if snap is None:
+            return False, "No local snapshot"
+
+        self.local_cache.replace(Tip.from_dict(t) for t in snap['tips'])
+        # 缓存现在和磁盘上一致
+        with self._dirty_lock:
+            self._dirty.clear()
+            self._saved_user = self.current_user
+        # 快照里可能有离线时加的占位 tip
+        self._temp_ids = {tip.real_id for tip in self.local_cache if is_temp_id(tip.real_id)}
+        self.sync_cursor = snap['sync_cursor']
+        self.group_names = snap['groups']
+        if self.current_group_id is None:
+            self.current_group_id = snap['current_group_id']
+            self.current_group_name = snap['current_group_name'] or "None"
+        return True, f"Loaded {len(self.local_cache)} cached tips."
 
-    def fetch_tips(self):
+    def _track_dirty(self, changed, removed, reset):
+        """Cache listener: remember what the next save_local_state has to write"""
+        with self._dirty_lock:
+            if reset:
+                self._dirty.clear()
+                self._saved_user = None
+                return
+            for tip in removed:
+                self._dirty[tip.index] = None
+            for tip in changed:
+                self._dirty[tip.index] = tip
+
+    def save_local_state(self):
+        """Write the snapshot: only the changed rows when one for this user is already on disk"""
+        store = self._get_store()
+        if store is None or not self.current_user:
+            return
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, {}
+            full = self._saved_user != self.current_user
+        try:
+            if full:
+                store.save(self.current_user, self.current_user_id, self.local_cache,
+                           self.current_group_id, self.current_group_name, self.sync_cursor)
+            else:
+                store.save_changes(
+                    self.current_user, self.current_user_id,
+                    [tip for tip in dirty.values() if tip is not None],
+                    [idx for idx, tip in dirty.items() if tip is None],
+                    self.current_group_id, self.current_group_name, self.sync_cursor)
+        except Exception:
+            # 没写进去：下次整份重写
+            with self._dirty_lock:
+                self._saved_user = None
+            return
+        with self._dirty_lock:
+            self._saved_user = self.current_user
+
+    def fetch_tips(self, full=False, wait=None):
         """
-        Fetch all tips (private + group) and merge them into local_cache.
+        Fetch tips (private + group) and merge them into local_cache.
+        Returns (msg, ok).
+
+        With a sync cursor from a previous fetch only changed / deleted tips are
+        requested (`?since=<cursor>`) and merged into the existing cache.
+        If the server rejects the cursor (409/410) we fall back to a full reload.
+        `wait` asks a long-poll capable server to hold the request until
+        something changes (at most `wait` seconds).
         """
+        replay_msg = ""
+        if self.current_user and self.journal.count(self.current_user):
+            replay_msg = self.replay_journal()
+
         try:
-            resp = self.session.get(f"{SERVER_URL}/show_tips/")
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                
-                raw_private = data.get('private_tips', [])
-                raw_public = data.get('public_tips', [])
-                maps = data.get('maps', {})
-                
-                self.local_cache = []
-
-                # 1. Process Private Tips
-                for tip in raw_private:
-                    self.local_cache.append({
-                        'index': tip['index'],
-                        'real_id': maps.get(str(tip['index'])), 
-                        'content': tip['content'],
-                        'ddl': tip['ddl'],
-                        'is_done': tip['is_done'],
-                        'type': 'PRIVATE',
-                        'completed_members': [],
-                        'group_id': None 
-                    })
-
-                # 2. Process Public (Group) Tips
-                for tip in raw_public:
-                    self.local_cache.append({
-                        'index': tip['index'],
-                        'real_id': maps.get(str(tip['index'])),
-                        'content': tip['content'], 
-                        'ddl': tip['ddl'],
-                        'is_done': tip['is_done'], 
-                        'type': 'GROUP',
-                        'group_id' : tip.get('group_id'),
-                        'group_name' : tip.get('group_name', 'Unknown'),
-                        'owner': tip.get('owner_name', 'Unknown'),
-                        'completed_members': tip.get('completed_members', [])
-                    })
-                
-                self.local_cache.sort(key=lambda x: x['index'])
-
-                # ========================================================
-                # 3. 处理当前上下文 (Group Context) 
-                # ========================================================
-                
-                # 如果还没有初始化 group_id，就用后端给的默认值
-                if not hasattr(self, 'current_group_id') or self.current_group_id is None:
-                    self.current_group_id = data.get('group_id')
-                
-                if self.current_group_id:
-                    target_name = f"Group {self.current_group_id}"
-                    for item in self.local_cache:
-                        if item.get('type') == 'GROUP' and str(item.get('group_id')) == str(self.current_group_id):
-                            target_name = item.get('group_name', target_name)
-                            break
-                    
-                    self.current_group_name = target_name
+            params = {}
+            # 响应回来时用它判断中间有没有别的 fetch 先合并了
+            sent_cursor = self.sync_cursor
+            if self.sync_cursor is not None and not full:
+                params['since'] = self.sync_cursor
+                if wait:
+                    params['wait'] = wait
+
+            # 网络请求不持锁：后台长轮询挂着时，前台的同步也能照常进行
+            resp = self.session.get(f"{self.server_url}/show_tips/", params=params,
+                                    stream=self.stream_fetch)
+            try:
+                if resp.status_code in (409, 410) and params:
+                    # 游标过期/被拒绝 -> 全量重新同步
+                    self.sync_cursor = None
+                    return self.fetch_tips(full=True)
+                if resp.status_code == 401:
+                    # 启动时靠这个判断 cookie 过期，不再单独校验 session
+                    self.session_expired = True
+                    self.last_fetch_ok = False
+                    return "Session expired", False
+                if resp.status_code != 200:
+                    self.last_fetch_ok = False
+                    return f"Auth failed or Server error: {resp.status_code}", False
+
+                # 流式时这里才真正下载 body
+                with profiler.span("cache.decode"):
+                    data, tips = self._read_payload(resp)
+            finally:
+                resp.close()
+
+            # 合并只在锁里做。两个请求可能交叉返回：请求发出后别的 fetch 已经合并了
+            # 更新的状态时，比它旧的响应合并进来会把状态改回去，直接丢掉
+            # (cursor 没被别人动过就照收：服务器重置后 cursor 可以变小)
+            with self._sync_lock:
+                before = (self.local_cache.version, self.sync_cursor, self.current_group_id)
+                if (self.sync_cursor != sent_cursor
+                        and _cursor_older(data.get('cursor'), self.sync_cursor)):
+                    self.last_fetch_ok = True
+                    self.session_expired = False
+                    return f"{replay_msg} Already up to date.".strip(), True
+                if data.get('delta') and params:
+                    with profiler.span("cache.merge_delta"):
+                        changed = self._merge_delta(data, tips)
+                    msg = f"Synced {changed} changes ({len(self.local_cache)} tips)."
                 else:
-                    self.current_group_name = "None"
+                    with profiler.span("cache.rebuild"):
+                        self.local_cache.replace(tips)
+                    msg = f"Updated {len(self.local_cache)} tips."
+                self._drop_stale_placeholders()
 
-                return f"Updated {len(self.local_cache)} tips.", False
-            
-            return f"Auth failed or Server error: {resp.status_code}", False
+                # 旧后端不返回 cursor，此时下次仍然全量拉取
+                self.sync_cursor = data.get('cursor')
+                self.last_fetch_ok = True
+                self.session_expired = False
+                self.last_synced = time.monotonic()
+                self.server_long_poll = bool(data.get('long_poll'))
+                self._update_group_context(data)
+                # 什么都没变（没有 cursor 的后端每次都是全量）就不重写快照
+                if (self.local_cache.version, self.sync_cursor, self.current_group_id) != before:
+                    with profiler.span("cache.save_snapshot"):
+                        self.save_local_state()
+            return f"{replay_msg} {msg}".strip(), True
+        except CircuitOpenError as e:
+            # 熔断中：不发请求，界面继续显示本地缓存
+            self.last_fetch_ok = False
+            return f"{replay_msg} {e} (showing cached tips)".strip(), False
         except Exception as e:
-            return f"Network Error: {e}", False
+            self.last_fetch_ok = False
+            return f"{replay_msg} Network Error: {e}".strip(), False
+
+    def _read_payload(self, resp):
+        """
+        Decode a /show_tips/ response into (data, tips): `data` holds every
+        top-level field except the two tip arrays, `tips` the Tip objects built
+        from them (not yet in the cache).
+
+        When streaming, each tip is built as soon as its JSON arrives, so the
+        raw body and the parsed arrays never exist in full. `maps` (index ->
+        real id) may come after the arrays, so real ids are filled in at the end.
+        """
+        builders = {'private_tips': Tip.from_private, 'public_tips': Tip.from_public}
+        tips, data = [], {}
+        if self.stream_fetch:
+            for key, value, is_item in iter_object(resp.iter_content(FETCH_CHUNK_SIZE), builders):
+                if is_item:
+                    tips.append(builders[key](value, None))
+                else:
+                    data[key] = value
+        else:
+            data = resp.json()
+            for key, build in builders.items():
+                tips.extend(build(raw, None) for raw in data.pop(key, None) or ())
+
+        maps = data.pop('maps', None) or {}
+        for tip in tips:
+            tip.real_id = maps.get(str(tip.index))
+        return data, tips
+
+    def _merge_delta(self, data, changed):
+        """
+        Merge a delta payload into local_cache, keyed by real_id.
+        Delta format: private_tips / public_tips hold changed or new tips
+        (already built into `changed` by _read_payload), `deleted` holds the
+        real ids removed since the cursor.
+        Returns the number of changed + deleted tips.
+        """
+        removed = self.local_cache.apply(changed, data.get('deleted', []))
+        return len(changed) + len(removed)
+
+    def _update_group_context(self, data):
+        """处理当前上下文 (Group Context)"""
+        # 如果还没有初始化 group_id，就用后端给的默认值
+        if self.current_group_id is None:
+            self.current_group_id = data.get('group_id')
+
+        # 群名以 /groups/my 为准；只有两边都不认识的组才从它的第一条 tip 里取
+        for gid in self.local_cache.group_ids():
+            if gid in self.group_names or self.groups.name(gid):
+                continue
+            first = self.local_cache.in_group(gid, 0, 1)
+            if first and first[0].group_name:
+                self.group_names[gid] = first[0].group_name
+
+        if self.current_group_id:
+            self.current_group_name = self.group_name(self.current_group_id)
+        else:
+            self.current_group_name = "None"
+
+    # === Background Sync ===
+    def start_sync(self, on_change=None, immediate=False):
+        """启动后台同步线程 (见 core/sync.py)"""
+        if self.sync_worker is None:
+            self.sync_worker = SyncWorker(self, on_change)
+            self.sync_worker.start(immediate)
+        return self.sync_worker
+
+    def request_sync(self):
+        """让后台线程马上同步一次；没有后台线程时直接同步"""
+        if self.sync_worker is not None and self.sync_worker.running:
+            self.sync_worker.trigger()
+            return "Refreshing...", True
+        return self.fetch_tips()
+
+    def is_fresh(self, max_age=GROUP_FRESH_AFTER):
+        """本地数据够新：max_age 秒内同步过，或者后台长轮询正挂着 (有变化会马上推过来)"""
+        if (self.sync_worker is not None and self.sync_worker.running
+                and self.server_long_poll and self.last_fetch_ok):
+            return True
+        return self.last_synced is not None and time.monotonic() - self.last_synced < max_age
+
+    def stop_sync(self):
+        if self.sync_worker is not None:
+            self.sync_worker.stop()
+            self.sync_worker = None
+
+    # === Search ===
+    def search(self, text, limit=None):
+        """
+        Tips matching `text` (words + done:/group:/due: filters, see core/search.py).
+        Returns (tips, error_msg). The index is built on first use and then
+        follows local_cache changes incrementally.
+        """
+        if self._search_index is None:
+            from core.search import SearchIndex
+            with profiler.span("search.build"):
+                self._search_index = SearchIndex(self.local_cache)
+        try:
+            with profiler.span("search.query"):
+                return self._search_index.query(text, limit=limit), None
+        except ValueError as e:
+            return [], str(e)
+
+    # === Tip Mutations ===
+    # 写操作分两步：stage_* 先改 local_cache 并返回 Mutation，commit() 再发请求，
+    # 失败时回滚。add_tip / delete_tips / change_tip_state 是两步连在一起的同步版本。
 
     def add_tip(self, content, ddl , group_id:int | None=None):
+        mutation, err = self.stage_add_tip(content, ddl, group_id)
+        if mutation is None: return err, False
+        return self.commit(mutation)
+
+    def delete_tips(self, input_str: str , group_id:int | None=None):
+        mutation, err = self.stage_delete_tips(input_str, group_id)
+        if mutation is None: return err, False
+        return self.commit(mutation)
+
+    def change_tip_state(self, input_str: str):
+        mutation, err = self.stage_change_tip_state(input_str)
+        if mutation is None: return err, False
+        return self.commit(mutation)
+
+    def stage_add_tip(self, content, ddl, group_id:int | None=None):
         if not self._check_ddl_format(ddl):
-            return "Invalid date format (YY-MM-DD HH:MM).", False
-        
+            return None, "Invalid date format (YY-MM-DD HH:MM)."
+
+        payload = {
+            "content": content, 
+            "ddl": ddl if ddl else None,
+            "group_id": group_id 
+        }
+        # 占位 tip：真实 index / real_id 等服务器同步回来再替换；
+        # 临时 id (负数) 让离线时后续的删除也能指到它
+        tid = temp_id()
+        self._inflight.add(tid)
+        self._temp_ids.add(tid)
+        if group_id is None:
+            placeholder = Tip(self.local_cache.max_index() + 1, tid, content, payload["ddl"], False)
+        else:
+            placeholder = Tip(self.local_cache.max_index() + 1, tid, content, payload["ddl"], False, GROUP,
+                              group_id=group_id,
+                              group_name=self.group_name(group_id),
+                              owner=self.current_user)
+        self.local_cache.upsert(placeholder)
+
+        return Mutation(
+            "/add_tip/", payload,
+            ok_msg="Tip added successfully!",
+            fail_msg=lambda resp: f"Add failed: {resp.status_code}",
+            error_prefix="Error: ",
+            undo=lambda: self.local_cache.discard(placeholder),
+            placeholders=[placeholder],
+        ), None
+
+    def stage_delete_tips(self, input_str: str, group_id:int | None=None):
+        if not self.local_cache: return None, "No tips locally."
+        indexes = self._parse_indexes(input_str)
+        if not indexes: return None, "No valid indexes."
+
+        real_ids = self._map_real_ids(indexes)
+        if not real_ids: return None, "Could not map to Real IDs."
+
+        removed = self.local_cache.apply([], real_ids)
+        # Backend expects 'delete_ids' list
+        return Mutation(
+            "/delete_tips/", {"tips_ids": real_ids, "group_id": group_id},
+            ok_msg=f"Deleted {len(real_ids)} tips.",
+            fail_msg=lambda resp: f"Delete failed: {resp.text}",
+            error_prefix="Delete Error: ",
+            undo=lambda: self.local_cache.apply(removed, []),
+        ), None
+
+    def stage_change_tip_state(self, input_str: str):
+        if not self.local_cache: return None, "No tips locally."
+        real_ids = self._map_real_ids(self._parse_indexes(input_str))
+        if not real_ids: return None, "No valid IDs."
+        if any(is_temp_id(rid) for rid in real_ids):
+            return None, "Tip not synced yet, try again after the next sync."
+
+        before = [self.local_cache.by_real_id(rid) for rid in real_ids]
+        after = []
+        for tip in before:
+            members = tip.completed_members
+            if tip.is_group and self.current_user:
+                if tip.is_done:
+                    members = tuple(m for m in members if m != self.current_user)
+                else:
+                    members = members + (self.current_user,)
+            after.append(tip.copy(is_done=not tip.is_done, completed_members=members))
+        self.local_cache.apply(after, [])
+
+        # Key is 'tips_ids' per your backend
+        return Mutation(
+            "/change_tip_state/", {"tips_ids": real_ids},
+            ok_msg="Changed state.",
+            fail_msg=lambda resp: f"Failed: {resp.text}",
+            error_prefix="Error: ",
+            undo=lambda: self.local_cache.apply(before, []),
+        ), None
+
+    def commit(self, mutation):
+        """
+        发送暂存的写操作；服务器拒绝时回滚本地修改。Returns (msg, ok)
+        连不上服务器 (请求没发出去) 时保留本地修改，写进离线队列。
+        """
         try:
-            payload = {
-                "content": content, 
-                "ddl": ddl if ddl else None,
-                "group_id": group_id 
-            }
-            resp = self.session.post(f"{SERVER_URL}/add_tip/", json=payload)
+            if self.current_user and self.journal.count(self.current_user):
+                # 前面还有排队的写，这条必须排在它们后面
+                return self._enqueue(mutation)
+
+            body = self._resolve_ids(mutation.body)
+            if any(is_temp_id(rid) for rid in body.get('tips_ids') or ()):
+                # 占位 tip 的 add 还没从服务器同步回来，不知道真实 id：不能假装成功
+                mutation.undo()
+                return "Tip not synced yet, try again after the next sync.", False
+            try:
+                resp = self.session.post(f"{self.server_url}{mutation.path}", json=body)
+            except RequestsConnectionError:
+                return self._enqueue(mutation)
+            except Exception as e:
+                # 读超时之类：服务器可能已经执行了，不能重放
+                mutation.undo()
+                return f"{mutation.error_prefix}{str(e)}", False
             if resp.status_code == 200:
-                return "Tip added successfully!", True
-            return f"Add failed: {resp.status_code}", False
-        except Exception as e:
-            return f"Error: {str(e)}", False
-        
-    
+                for tip in mutation.placeholders:
+                    self._await_added(tip)
+                return mutation.ok_msg, True
+            mutation.undo()
+            return mutation.fail_msg(resp), False
+        finally:
+            for tip in mutation.placeholders:
+                self._inflight.discard(tip.real_id)
 
-    def delete_tips(self, input_str: str , group_id:int | None=None):
-        if not self.local_cache: return "No tips locally.", False
+    def _enqueue(self, mutation):
+        entry = {'user': self.current_user, 'path': mutation.path, 'body': mutation.body}
+        if mutation.path == ADD and mutation.placeholders:
+            entry['temp_id'] = mutation.placeholders[0].real_id
         try:
-            indexes = set()
-            parts = input_str.split(',')
-            for part in parts:
-                if part.strip().isdigit():
-                    indexes.add(int(part.strip()))
-            
-            if not indexes: return "No valid indexes.", False
+            self.journal.append(entry)
+        except OSError as e:
+            mutation.undo()
+            return f"{mutation.error_prefix}offline and cannot queue: {e}", False
+        mutation.queued = True
+        # 快照里带上本地修改，重启后还能看到
+        self.save_local_state()
+        return f"Offline: change queued ({self.journal.count(self.current_user)} pending).", True
 
-            real_ids = []
-            for item in self.local_cache:
-                if item['index'] in indexes:
-                    real_ids.append(item['real_id'])
-            
-            if not real_ids: return "Could not map to Real IDs.", False
+    def replay_journal(self):
+        """
+        Coalesce and send the queued writes of the current user, in order.
+        Stops at the first write that cannot reach the server (the rest stays
+        queued); writes the server rejects are dropped and reported as conflicts.
+        Returns a status message.
+        """
+        if not self._replay_lock.acquire(blocking=False):
+            return ""
+        try:
+            # 发送期间写线程可能又追加了新的写，最后只换掉这次拿出来的这些
+            pending = self.journal.pending(self.current_user)
+            plan = coalesce(pending)
+            remaining, held, conflicts, sent = [], [], [], 0
+            for i, entry in enumerate(plan):
+                body = self._resolve_ids(entry['body'])
+                unresolved = [rid for rid in body.get('tips_ids') or () if is_temp_id(rid)]
+                if unresolved:
+                    # add 已发出、真实 tip 还没同步回来：这几个 id 留在队列里等下一次
+                    waiting = [rid for rid in unresolved if rid in self._awaiting or rid in self._inflight]
+                    if waiting:
+                        held.append({**entry, 'body': {**body, 'tips_ids': waiting}})
+                    lost = [rid for rid in unresolved if rid not in waiting]
+                    if lost:
+                        conflicts.append(f"{entry['path'].strip('/')}: tip was never synced")
+                    body = {**body, 'tips_ids': [rid for rid in body['tips_ids'] if not is_temp_id(rid)]}
+                    if not body['tips_ids']:
+                        continue
+                try:
+                    resp = self.session.post(f"{self.server_url}{entry['path']}", json=body)
+                except RequestsConnectionError:
+                    remaining = [{**entry, 'body': body}] + plan[i + 1:]
+                    break
+                except Exception as e:
+                    # 不知道服务器有没有执行，不能再发一次
+                    conflicts.append(f"{entry['path'].strip('/')}: {e}")
+                    continue
+                if resp.status_code == 200:
+                    sent += 1
+                    tid = entry.get('temp_id')
+                    if tid is not None:
+                        # 占位 tip 可能已经在本地删掉了 (删除还排在队列后面)，按 body 重建
+                        placeholder = self.local_cache.by_real_id(tid) or Tip(
+                            0, tid, body['content'], body.get('ddl'), False,
+                            group_id=body.get('group_id'))
+                        self._await_added(placeholder)
+                elif resp.status_code == 401:
+                    # session 过期不是冲突：留在队列里，重新登录后再发
+                    self.session_expired = True
+                    remaining = [{**entry, 'body': body}] + plan[i + 1:]
+                    break
+                else:
+                    conflicts.append(f"{entry['path'].strip('/')}: {resp.status_code} {resp.text[:60]}")
+            remaining = held + remaining
+            self.journal.replace(self.current_user, remaining, consumed=pending)
+            self.write_conflicts = conflicts
 
-            # Backend expects 'delete_ids' list
-            response = self.session.post(f"{SERVER_URL}/delete_tips/", json={
-                "tips_ids": real_ids,
-                "group_id": group_id
-                
-            })
-            if response.status_code == 200:
-                return f"Deleted {len(real_ids)} tips.", True
-            return f"Delete failed: {response.text}", False
+            parts = []
+            if sent:
+                parts.append(f"Replayed {sent} queued writes.")
+            if conflicts:
+                parts.append(f"{len(conflicts)} conflicted: {conflicts[0]}")
+            if remaining:
+                parts.append(f"{len(remaining)} still queued.")
+            return " ".join(parts)
+        finally:
+            self._replay_lock.release()
 
-        except Exception as e:
-            return f"Delete Error: {str(e)}", False
-        
-    def change_tip_state(self, input_str: str):
-        if not self.local_cache: return "No tips locally.", False
-        try:
-            indexes = set()
-            parts = input_str.split(',') 
-            for part in parts:
-                if part.strip().isdigit():
-                    indexes.add(int(part.strip()))
-            
-            real_ids = []
-            for item in self.local_cache:
-                if item['index'] in indexes:
-                    real_ids.append(item['real_id'])
-            
-            if not real_ids: return "No valid IDs.", False
+    def _resolve_ids(self, body):
+        """tips_ids 里已经认出真实 id 的临时 id 换成真实 id"""
+        ids = body.get('tips_ids')
+        if not ids or not any(is_temp_id(rid) for rid in ids):
+            return body
+        return {**body, 'tips_ids': [self._resolved.get(rid, rid) for rid in ids]}
 
-            # Key is 'tips_ids' per your backend
-            response = self.session.post(f"{SERVER_URL}/change_tip_state/", json={"tips_ids": real_ids})
-            if response.status_code == 200:
-                return f"Changed state.", True
-            return f"Failed: {response.text}", False
-        except Exception as e:
-            return f"Error: {str(e)}", False
+    def _await_added(self, placeholder):
+        """add 已被服务器接受：等它的真实 tip 同步回来 (只在这之后才开始认)"""
+        self._awaiting[placeholder.real_id] = (
+            placeholder.content, placeholder.ddl_dt, group_key(placeholder.group_id))
+
+    def _match_added(self, changed, removed, reset):
+        """
+        Cache listener: recognise the server's copy of a tip we added (same
+        content, deadline and group; the newest one wins) so later writes that
+        still name the placeholder's temporary id reach the real tip.
+        """
+        if not self._awaiting:
+            return
+        claimed = set(self._resolved.values())
+        best = {}
+        for tip in changed:
+            rid = tip.real_id
+            if rid is None or is_temp_id(rid) or rid in claimed:
+                continue
+            sig = (tip.content, tip.ddl_dt, group_key(tip.group_id))
+            for tid, want in self._awaiting.items():
+                if want == sig and (tid not in best or rid > best[tid]):
+                    best[tid] = rid
+        for tid, rid in sorted(best.items()):
+            if rid not in claimed:
+                self._resolved[tid] = rid
+                claimed.add(rid)
+                self._awaiting.pop(tid, None)
+
+    def _drop_stale_placeholders(self):
+        """去掉已经不在队列里、也不在发送中的占位 tip (服务器的真实数据已经到了)"""
+        if not self._temp_ids:
+            return
+        keep = set(self._inflight)
+        if self.current_user:
+            keep.update(e.get('temp_id') for e in self.journal.pending(self.current_user))
+        for tid in self._temp_ids - keep:
+            tip = self.local_cache.by_real_id(tid)
+            if tip is not None:
+                self.local_cache.discard(tip)
+            self._temp_ids.discard(tid)
+
+    def reconcile(self, mutation):
+        """写成功后做一次 delta 同步，拿到服务器的真实数据后去掉占位 tip"""
+        if mutation.queued:
+            # 离线排队中：占位 tip 要一直留到重放完成
+            return None
+        msg, ok = self.fetch_tips()
+        if ok:
+            for tip in mutation.placeholders:
+                self.local_cache.discard(tip)
+        return msg
+
+    def _parse_indexes(self, input_str):
+        indexes = set()
+        for part in input_str.split(','):
+            if part.strip().isdigit():
+                indexes.add(int(part.strip()))
+        return indexes
+
+    def _map_real_ids(self, indexes):
+        """显示序号 -> 后端真实 ID"""
+        real_ids = []
+        for idx in sorted(indexes):
+            item = self.local_cache.by_index(idx)
+            if item is not None:
+                real_ids.append(item.real_id)
+        return real_ids
 
     def _check_ddl_format(self, ddl_str):
         try:
@@ -264,8 +783,9 @@ class TipsClient:
     # === Group Actions ===
     def create_group(self, name):
         try:
-            resp = self.session.post(f"{SERVER_URL}/groups/create", json={"name": name})
+            resp = self.session.post(f"{self.server_url}/groups/create", json={"name": name})
             if resp.status_code == 200:
+                self.groups.invalidate_my()
                 return f"Created! Code: {resp.json()['invite_code']}", True
             return f"Failed: {resp.text}", False
         except Exception as e: return f"Error: {e}", False
@@ -273,29 +793,52 @@ class TipsClient:
     def join_group(self, invite_code):
         try:
             # Fixed URL construction
-            resp = self.session.post(f"{SERVER_URL}/groups/join/{invite_code}")
+            resp = self.session.post(f"{self.server_url}/groups/join/{invite_code}")
             if resp.status_code == 200:
+                self.groups.invalidate_my()
                 return f"Joined group successfully!", True
             return f"Join failed: {resp.text}", False
         except Exception as e: return f"Error: {e}", False
 
     def list_my_groups(self):
+        cached = self.groups.my_groups()
+        if cached is not None:
+            return cached, True
         try:
-            resp = self.session.get(f"{SERVER_URL}/groups/my")
+            resp = self.session.get(f"{self.server_url}/groups/my")
             if resp.status_code == 200:
                 # Backend returns {"groups": [...]}
-                return resp.json().get('groups', []), False 
+                groups = resp.json().get('groups', [])
+                self._remember_groups(groups)
+                return groups, True
             return [], False
         except: return [], False
     
     def get_group_info(self, group_id):
+        cached = self.groups.members(group_id)
+        if cached is not None:
+            return cached, True
         try:
             # Fixed URL: /members instead of /info
-            resp = self.session.get(f"{SERVER_URL}/groups/{group_id}/info")
+            resp = self.session.get(f"{self.server_url}/groups/{group_id}/info")
             if resp.status_code == 200:
-                return resp.json()['members'], True
+                members = resp.json()['members']
+                self.groups.set_members(group_id, members)
+                return members, True
             return f"Error: {resp.text}", False
         except Exception as e: return f"Network Error: {e}", False
+
+    def _remember_groups(self, groups):
+        self.groups.set_my_groups(groups)
+        for g in groups:
+            if g.get('id') is not None and g.get('name'):
+                self.group_names[group_key(g['id'])] = g['name']
+
+    def group_name(self, group_id):
+        """群名：元数据缓存 -> 快照里存的 -> Group N"""
+        return (self.groups.name(group_id)
+                or self.group_names.get(group_key(group_id))
+                or f"Group {group_id}")
     
     def set_group_admin(self, group_id: int, user_ids): # 去掉 :list 避免误导，或者保留但要在内部处理
         try:
@@ -310,12 +853,16 @@ class TipsClient:
             else:
                 real_user_ids = user_ids
 
-            resp = self.session.post(f"{SERVER_URL}/groups/set_admin", json={
+            resp = self.session.post(f"{self.server_url}/groups/set_admin", json={
                 "group_id": group_id,
                 "user_ids": real_user_ids # 发送处理后的列表
             })
             
-            if resp.status_code == 200: return "Admins updated!", True
+            if resp.status_code == 200:
+                # 角色变了：成员列表和 /groups/my 里的 role 都要重新取
+                self.groups.invalidate_group(group_id)
+                self.groups.invalidate_my()
+                return "Admins updated!", True
             # 建议打印 resp.json() 方便调试，而不是 resp.text
             return f"Failed: {resp.text}", False
             
@@ -323,27 +870,19 @@ class TipsClient:
 
     # === Context Switching ===
     def enter_group(self, group_id):
-        """切换群组视图"""
+        """
+        切换群组视图：tips 在 local_cache 里已按群组分好，群名来自元数据缓存，
+        不等网络。Returns (msg, needs_refresh): needs_refresh 为 True 时
+        本地数据可能过时，调用方应在后台同步一次。
+        """
         try:
             gid = int(group_id)
-            self.current_group_id = gid
-            
-            try:
-                self.fetch_tips() 
-            except Exception as e:
-                # 如果拉取失败（比如没网，或者组不存在），还是会让它切过去，但名字是 Unknown
-                pass 
-
-            found_name = "Unknown Group"
-            for t in self.local_cache:
-                if t.get('group_id') == gid and t.get('group_name'):
-                    found_name = t['group_name']
-                    break
-            self.current_group_name = found_name
-            return f"Context switched to Group {gid} ({found_name})", True
-            
         except ValueError:
             return "Invalid Group ID", False
+        self.current_group_id = gid
+        self.current_group_name = self.group_name(gid)
+        count = self.local_cache.count_group(gid)
+        return f"Context switched to Group {gid} ({self.current_group_name}, {count} tips)", not self.is_fresh()
 
     # def exit_group(self):
     #     """Set context back to private"""
@@ -1,12 +1,34 @@
 # core/crypto.py
 import base64
-from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import padding
+import hashlib
+import json
+import threading
+import time
+from functools import lru_cache
 
-def encrypt_password(password: str, public_key_pem: bytes) -> str:
-    """接收明文密码和PEM公钥，返回Base64加密字符串"""
+# cryptography 很重 (几十 ms)，只有登录/注册真正加密时才导入；
+# 用缓存的 session 自动登录时完全不会加载它
+
+@lru_cache(maxsize=8)
+def load_public_key(public_key_pem: bytes):
+    """PEM -> 公钥对象 (同一个 PEM 只解析一次)"""
+    from cryptography.hazmat.primitives import serialization
+    return serialization.load_pem_public_key(public_key_pem)
+
+def fingerprint(public_key_pem: bytes) -> str:
+    return hashlib.sha256(public_key_pem).hexdigest()
+
+def encrypt_password(password: str, public_key_pem) -> str:
+    """接收明文密码和PEM公钥(或已解析的公钥对象)，返回Base64加密字符串"""
     try:
-        public_key = serialization.load_pem_public_key(public_key_pem)
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+        if isinstance(public_key_pem, (bytes, str)):
+            if isinstance(public_key_pem, str):
+                public_key_pem = public_key_pem.encode('utf-8')
+            public_key = load_public_key(public_key_pem)
+        else:
+            public_key = public_key_pem
         encrypted_bytes = public_key.encrypt(
             password.encode('utf-8'),
             padding.OAEP(
@@ -18,4 +40,84 @@ def encrypt_password(password: str, public_key_pem: bytes) -> str:
         return base64.b64encode(encrypted_bytes).decode('utf-8')
     except Exception as e:
         print(f"Encryption Error: {e}")
-        return ""
\ No newline at end of file
+        return ""
+
+
+class PublicKeyCache:
+    """
+    服务器公钥缓存 (per server URL)
+
+    Disk: {server_url: {"pem", "fingerprint", "fetched_at"}} in a JSON file.
+    Memory: the parsed key object, so a login costs neither a /public_key/
+    round trip nor a PEM parse until the TTL runs out or the key is invalidated.
+    """
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = None    # server_url -> disk entry (lazy)
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        for url, entry in raw.items():
+            # 指纹对不上说明文件被改坏了，这条不要
+            try:
+                if fingerprint(entry['pem'].encode('utf-8')) == entry['fingerprint']:
+                    self._entries[url] = entry
+            except (KeyError, AttributeError, TypeError):
+                continue
+
+    def _save(self):
+        try:
+            with open(self.path, "w") as f:
+                json.dump(self._entries, f)
+        except OSError:
+            pass
+
+    def get(self, server_url, fetch_pem):
+        """
+        Return (public_key, from_cache). `fetch_pem()` is only called on a miss
+        and returns the PEM bytes, or None when the server refused (-> (None, False)).
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(server_url)
+            if entry and time.time() - entry['fetched_at'] < self.ttl:
+                return load_public_key(entry['pem'].encode('utf-8')), True
+
+        pem = fetch_pem()
+        if pem is None:
+            return None, False
+        with self._lock:
+            self._entries[server_url] = {
+                'pem': pem.decode('utf-8'),
+                'fingerprint': fingerprint(pem),
+                'fetched_at': time.time(),
+            }
+            self._save()
+        return load_public_key(pem), False
+
+    def invalidate(self, server_url):
+        """Drop the key for `server_url` (e.g. the server rotated it)"""
+        with self._lock:
+            self._load()
+            if self._entries.pop(server_url, None) is not None:
+                self._save()
+
+
+_key_caches = {}
+
+def get_key_cache(path, ttl):
+    """同一个文件在进程内共享一个 cache（批量注册时只取一次公钥）"""
+    cache = _key_caches.get(path)
+    if cache is None:
+        cache = _key_caches[path] = PublicKeyCache(path, ttl)
+    cache.ttl = ttl
+    return cache
@@ -0,0 +1,173 @@
+# core/deadline.py
+"""
+截止时间解析与状态分桶 (Deadline parsing and status buckets)
+
+- DeadlineParser remembers which format last matched, so a source that always
+  sends the same format (the server, the local store) hits it on the first try.
+- StatusBoard classifies every tip as overdue / urgent / future in one pass
+  against a single `now`, and remembers the next moment any tip changes bucket.
+  Until that boundary the previous result is reused; tips the cache reports
+  as changed / removed in between are reclassified one by one.
+"""
+import threading
+from datetime import datetime, timedelta
+
+DDL_FORMATS = (
+    '%y-%m-%d %H:%M', '%Y-%m-%d %H:%M',
+    '%Y-%m-%d %H:%M:%S', '%y-%m-%d %H:%M:%S', '%Y-%m-%d'
+)
+
+URGENT_WINDOW = timedelta(days=1)
+
+# 分桶结果直接用 renderer UI_CONFIG['theme'] 的键名
+OVERDUE = "status_overdue"
+URGENT = "status_urgent"
+FUTURE = "status_future"
+DONE = "status_done"
+NONE = "status_none"
+
+
+class DeadlineParser:
+    def __init__(self, formats=DDL_FORMATS):
+        self.formats = list(formats)
+
+    def parse(self, raw_ddl):
+        """尝试解析时间格式，返回 datetime 对象或 None"""
+        if not raw_ddl:
+            return None
+
+        # 优先尝试 ISO 格式
+        if "T" in raw_ddl:
+            try:
+                return datetime.fromisoformat(raw_ddl)
+            except ValueError:
+                pass
+
+        formats = self.formats
+        for i, fmt in enumerate(formats):
+            try:
+                dt = datetime.strptime(raw_ddl, fmt)
+            except ValueError:
+                continue
+            if i:
+                # 命中的格式挪到最前面，下一条大概率还是它 (整体替换，线程安全)
+                self.formats = [fmt] + [f for f in formats if f != fmt]
+            return dt
+        return None
+
+
+# 每个数据来源一个 parser
+server_parser = DeadlineParser()
+store_parser = DeadlineParser()
+_default_parser = DeadlineParser()
+
+
+def parse_ddl(raw_ddl):
+    """尝试解析时间格式，返回 datetime 对象或 None"""
+    return _default_parser.parse(raw_ddl)
+
+
+def classify(ddl_dt, is_done, now):
+    """单个 tip 的状态桶"""
+    if is_done:
+        return DONE
+    if ddl_dt is None:
+        return NONE
+    if ddl_dt < now:
+        return OVERDUE
+    if ddl_dt < now + URGENT_WINDOW:
+        return URGENT
+    return FUTURE
+
+
+class StatusBoard:
+    """
+    Batched status classification for a TipCache.
+    `generation` changes whenever any bucket may have changed, so renderers
+    can use it as a cache key.
+    """
+    def __init__(self):
+        self.generation = 0
+        self._buckets = {}          # tip index -> bucket
+        self._cache = None          # the TipCache we listen to
+        self._next_boundary = None  # datetime, None = 没有会变的 tip
+        # 监听器收到、还没重新分桶的变化: index -> Tip (None = 删了)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._stale = True          # 缓存整体重建过 -> 全量重算
+
+    def refresh(self, cache, now=None):
+        """Re-classify what the cache changed since the last call, everything when a boundary was crossed"""
+        now = now or datetime.now()
+        if cache is not self._cache:
+            self._attach(cache)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            stale, self._stale = self._stale, False
+        if stale or (self._next_boundary is not None and now >= self._next_boundary):
+            self._rescan(cache, now)
+        elif pending:
+            for index, tip in pending.items():
+                if tip is None:
+                    self._buckets.pop(index, None)
+                else:
+                    self._classify(tip, now)
+        else:
+            return False
+        self.generation += 1
+        return True
+
+    def _attach(self, cache):
+        if self._cache is not None:
+            self._cache.remove_listener(self._on_change)
+        self._cache = cache
+        with self._lock:
+            self._pending = {}
+            self._stale = True
+        cache.add_listener(self._on_change)
+
+    def _on_change(self, changed, removed, reset):
+        with self._lock:
+            if reset:
+                self._pending = {}
+                self._stale = True
+                return
+            for tip in removed:
+                self._pending[tip.index] = None
+            for tip in changed:
+                self._pending[tip.index] = tip
+
+    def _classify(self, tip, now):
+        dt = tip.ddl_dt
+        self._buckets[tip.index] = classify(dt, tip.is_done, now)
+        if tip.is_done or dt is None or dt < now:
+            return
+        # 下一次变桶: future -> urgent 在 ddl-1天, urgent -> overdue 在 ddl
+        edge = dt - URGENT_WINDOW if dt >= now + URGENT_WINDOW else dt
+        if self._next_boundary is None or edge < self._next_boundary:
+            self._next_boundary = edge
+
+    def _rescan(self, cache, now):
+        self._buckets = {}
+        self._next_boundary = None
+        for tip in cache:
+            self._classify(tip, now)
+
+    def reset(self):
+        """Forget everything (the next refresh() may get a different TipCache)"""
+        if self._cache is not None:
+            self._cache.remove_listener(self._on_change)
+        self._cache = None
+        self._buckets = {}
+        self._next_boundary = None
+        with self._lock:
+            self._pending = {}
+            self._stale = True
+        self.generation += 1
+
+    def bucket(self, tip):
+        return self._buckets.get(tip.index) or classify(tip.ddl_dt, tip.is_done, datetime.now())
+
+    @property
+    def next_boundary(self):
+        return self._next_boundary
@@ -0,0 +1,103 @@
+# core/groups.py
+"""
+群组元数据缓存 (Group metadata cache)
+
+- TTLCache: size-bounded LRU where every entry carries its own expiry.
+- GroupCache: what the client knows about groups, kept in one TTLCache
+    ("my",)            -> the /groups/my list
+    ("members", gid)   -> /groups/{gid}/info members
+    ("name", gid)      -> group name (learned from /groups/my, longest TTL)
+  TipsClient invalidates entries after create_group / join_group /
+  set_group_admin, so writes are visible on the next lookup.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from config import GROUP_CACHE_SIZE, GROUP_LIST_TTL, GROUP_MEMBERS_TTL, GROUP_NAME_TTL
+from core.cache import group_key
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()      # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                # 最久没用过的先走
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class GroupCache:
+    def __init__(self, maxsize=GROUP_CACHE_SIZE, list_ttl=GROUP_LIST_TTL,
+                 members_ttl=GROUP_MEMBERS_TTL, name_ttl=GROUP_NAME_TTL):
+        self.list_ttl = list_ttl
+        self.members_ttl = members_ttl
+        self.name_ttl = name_ttl
+        self._cache = TTLCache(maxsize, list_ttl)
+
+    # --- /groups/my ---
+    def my_groups(self):
+        """Cached /groups/my list, or None when unknown / expired"""
+        return self._cache.get(("my",))
+
+    def set_my_groups(self, groups):
+        self._cache.set(("my",), list(groups), self.list_ttl)
+        for g in groups:
+            if g.get('id') is not None and g.get('name'):
+                self.set_name(g['id'], g['name'])
+
+    # --- members ---
+    def members(self, group_id):
+        return self._cache.get(("members", group_key(group_id)))
+
+    def set_members(self, group_id, members):
+        self._cache.set(("members", group_key(group_id)), members, self.members_ttl)
+
+    # --- names ---
+    def name(self, group_id):
+        return self._cache.get(("name", group_key(group_id)))
+
+    def set_name(self, group_id, name):
+        self._cache.set(("name", group_key(group_id)), name, self.name_ttl)
+
+    # --- invalidation ---
+    def invalidate_my(self):
+        self._cache.pop(("my",))
+
+    def invalidate_group(self, group_id):
+        self._cache.pop(("members", group_key(group_id)))
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,156 @@
+# core/journal.py
+"""
+离线写队列 (Durable offline write journal)
+
+When the backend cannot be reached, TipsClient.commit() appends the write to
+an append-only JSONL file instead of throwing the user's input away:
+
+    {"user": "alice", "path": "/add_tip/", "body": {...}, "temp_id": -1739...}
+
+Each line is fsync'ed, so queued writes survive a crash or restart; a torn
+last line is skipped on load. Before the next fetch the queue is coalesced and
+replayed in order:
+
+- toggle + toggle on the same tip cancel out,
+- add + delete of a tip that was never sent cancel out,
+- toggles of a deleted tip are dropped,
+- what is left goes out as the adds (in order), one /change_tip_state/ with
+  every toggled id, and one /delete_tips/ per group.
+
+Tips added while offline carry a negative temporary real_id (see temp_id()),
+so later deletes can refer to them before the server has assigned an id.
+"""
+import json
+import os
+import threading
+import time
+
+ADD = "/add_tip/"
+DELETE = "/delete_tips/"
+TOGGLE = "/change_tip_state/"
+
+
+def temp_id():
+    """Temporary real_id for a tip the server has not seen yet (always < 0)"""
+    return -time.time_ns() // 1000
+
+
+def is_temp_id(real_id):
+    return isinstance(real_id, int) and real_id < 0
+
+
+def coalesce(entries):
+    """Collapse a queue of writes into the fewest requests with the same effect"""
+    adds = {}           # temp_id -> entry, in order
+    toggled = {}        # real_id -> True (dict 保持第一次出现的顺序)
+    deleted = {}        # real_id -> group_id
+    for entry in entries:
+        path, body = entry['path'], entry['body']
+        if path == ADD:
+            adds[entry.get('temp_id') or id(entry)] = entry
+        elif path == TOGGLE:
+            for rid in body.get('tips_ids', []):
+                if rid in deleted or is_temp_id(rid):
+                    continue
+                if toggled.pop(rid, None) is None:
+                    toggled[rid] = True
+        elif path == DELETE:
+            for rid in body.get('tips_ids', []):
+                if is_temp_id(rid) and adds.pop(rid, None) is not None:
+                    # add 和 delete 都还没发：两条都不用发了
+                    continue
+                # 临时 id 的 add 已经发过：留着，重放时换成真实 id
+                toggled.pop(rid, None)
+                deleted[rid] = body.get('group_id')
+
+    user = entries[0]['user'] if entries else None
+    plan = list(adds.values())
+    if toggled:
+        plan.append({'user': user, 'path': TOGGLE, 'body': {'tips_ids': list(toggled)}})
+    by_group = {}
+    for rid, gid in deleted.items():
+        by_group.setdefault(gid, []).append(rid)
+    for gid, ids in by_group.items():
+        plan.append({'user': user, 'path': DELETE, 'body': {'tips_ids': ids, 'group_id': gid}})
+    return plan
+
+
+class WriteJournal:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None    # lazy
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 写到一半断电的最后一行
+                        continue
+                    if isinstance(entry, dict) and 'path' in entry:
+                        self._entries.append(entry)
+        except OSError:
+            pass
+
+    def pending(self, user):
+        """Queued writes of `user`, oldest first"""
+        with self._lock:
+            self._load()
+            return [e for e in self._entries if e.get('user') == user]
+
+    def count(self, user):
+        with self._lock:
+            self._load()
+            return sum(1 for e in self._entries if e.get('user') == user)
+
+    def append(self, entry):
+        with self._lock:
+            self._load()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries.append(entry)
+
+    def replace(self, user, entries, consumed=None):
+        """
+        Swap `user`'s queue for `entries` (atomic rewrite; other users untouched).
+        With `consumed` (the entries pending() returned earlier) only those are
+        swapped out: writes appended in the meantime stay queued after `entries`.
+        """
+        with self._lock:
+            self._load()
+            if consumed is None:
+                drop = {id(e) for e in self._entries if e.get('user') == user}
+            else:
+                drop = {id(e) for e in consumed}
+            kept, inserted = [], False
+            for e in self._entries:
+                if id(e) not in drop:
+                    kept.append(e)
+                elif not inserted:
+                    # 剩下没发出去的放回原来的位置，排在新追加的前面
+                    kept.extend(entries)
+                    inserted = True
+            if not inserted:
+                kept.extend(entries)
+            if not kept:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+            else:
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    for e in kept:
+                        f.write(json.dumps(e, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            self._entries = kept
@@ -0,0 +1,173 @@
+# core/jsonstream.py
+"""
+JSON 流式解析 (Incremental decode of a top-level JSON object)
+
+    for key, value, is_item in iter_object(resp.iter_content(65536), {"private_tips"}):
+        ...
+
+Walks one top-level JSON object while the bytes are still arriving and yields
+- (key, element, True)  for every element of an array stored under a key in
+  `stream_keys` - the caller can turn it into a cache entry right away,
+- (key, value, False)   for every other top-level field.
+Neither the whole body nor the whole parsed document is ever held in memory.
+
+Uses ijson when it is installed (C backend), otherwise a small parser built on
+json.JSONDecoder.raw_decode.
+"""
+import codecs
+import json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_decoder = json.JSONDecoder()
+_WS = " \t\r\n"
+# 已消费的前缀超过这么多字符就丢掉，缓冲区只留没解析的部分
+_COMPACT_AT = 64 * 1024
+
+
+class _Buffer:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self, at_least=1):
+        """Append at least `at_least` more characters (less at EOF); False if nothing came"""
+        if self.eof:
+            return False
+        if self.pos > _COMPACT_AT:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        parts, got = [], 0
+        for chunk in self._chunks:
+            part = self._utf8.decode(chunk)
+            parts.append(part)
+            got += len(part)
+            if got >= at_least:
+                break
+        else:
+            tail = self._utf8.decode(b"", final=True)
+            parts.append(tail)
+            got += len(tail)
+            self.eof = True
+        self.text += "".join(parts)
+        return got > 0
+
+    def peek(self):
+        """Next non-whitespace character ('' at EOF); does not consume it"""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in _WS:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.more():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode one JSON value at the current position, reading more input as needed"""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.text, self.pos)
+                # 数字可能被切在块边界上 ("12" | "34")，后面必须还有字符才算完整
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # 至少把未解析部分翻倍，保证大值的重试总代价是线性的
+            self.more(max(len(self.text) - self.pos, 4096))
+
+
+def _iter_builtin(chunks, stream_keys):
+    buf = _Buffer(chunks)
+    buf.expect("{")
+    if buf.peek() == "}":
+        return
+    while True:
+        key = buf.value()
+        buf.expect(":")
+        if key in stream_keys and buf.peek() == "[":
+            buf.pos += 1
+            if buf.peek() == "]":
+                buf.pos += 1
+            else:
+                while True:
+                    yield key, buf.value(), True
+                    sep = buf.peek()
+                    buf.pos += 1
+                    if sep == "]":
+                        break
+                    if sep != ",":
+                        raise ValueError(f"Expected ',' or ']' at offset {buf.pos - 1}")
+        else:
+            yield key, buf.value(), False
+
+        sep = buf.peek()
+        buf.pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError(f"Expected ',' or '}}' at offset {buf.pos - 1}")
+
+
+class _ChunkReader:
+    """File-like read() over an iterator of byte chunks (for ijson)"""
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._pending += chunk
+        if size < 0:
+            size = len(self._pending)
+        out, self._pending = self._pending[:size], self._pending[size:]
+        return out
+
+
+def _iter_ijson(chunks, stream_keys):
+    key, in_stream = None, False
+    builder, depth = None, 0
+    for prefix, event, value in ijson.parse(_ChunkReader(chunks), use_float=True):
+        if builder is None:
+            if prefix == "":
+                if event == "map_key":
+                    key = value
+                continue
+            if key in stream_keys and prefix == key and event in ("start_array", "end_array"):
+                in_stream = event == "start_array"
+                continue
+            builder, depth = ijson.ObjectBuilder(), 0
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+        if depth == 0:
+            yield key, builder.value, in_stream
+            builder = None
+
+
+def iter_object(chunks, stream_keys=()):
+    """Yield (key, value, is_item) from a JSON object arriving as byte chunks"""
+    stream_keys = frozenset(stream_keys)
+    if ijson is not None:
+        return _iter_ijson(chunks, stream_keys)
+    return _iter_builtin(chunks, stream_keys)
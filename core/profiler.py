@@ -0,0 +1,181 @@
+# core/profiler.py
+"""
+热点路径计时 (Hot-path timing spans, `tips --profile`)
+
+    with profiler.span("http GET /show_tips/"):
+        ...
+
+Disabled by default: span() then hands back one shared no-op context manager,
+so instrumented code pays a global lookup and a function call, nothing more.
+When enabled, every span is
+- recorded as a Chrome trace event (open the file in chrome://tracing or Perfetto),
+- folded into per-name rolling stats used for the live status-bar summary.
+The first frame also records time-to-first-frame and how many sequential HTTP
+round trips preceded it (startup_summary(), printed on exit).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+enabled = False
+
+_NOOP = nullcontext()
+_events = []
+_stats = {}             # name -> deque of recent durations (ms)
+_lock = threading.Lock()
+_trace_path = None
+_cprofile = None
+_cprofile_path = None
+_t0 = time.perf_counter()
+_first_frame = None     # perf_counter() when the first frame was on screen
+
+# 状态栏里显示的 span (按这个顺序)，其它的只进 trace 文件
+SUMMARY_PREFIXES = ("http ", "cache.", "cmd:", "frame")
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        record(self.name, self.start, end, self.args)
+        return False
+
+
+def span(name, **args):
+    """Time a block; a shared no-op when profiling is off"""
+    if not enabled:
+        return _NOOP
+    return _Span(name, args)
+
+
+def record(name, start, end, args=None):
+    """Add one finished span (perf_counter timestamps)"""
+    ms = (end - start) * 1000
+    event = {
+        "name": name,
+        "cat": name.split(" ")[0].split(":")[0].split(".")[0],
+        "ph": "X",
+        "ts": round((start - _t0) * 1e6, 1),
+        "dur": round(ms * 1000, 1),
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    if args:
+        event["args"] = args
+    with _lock:
+        _events.append(event)
+        _stats.setdefault(name, deque(maxlen=100)).append(ms)
+
+
+def first_frame():
+    """Call after every frame; the first one records `startup.first_frame` (time since this module was imported)"""
+    global _first_frame
+    if enabled and _first_frame is None:
+        _first_frame = time.perf_counter()
+        record("startup.first_frame", _t0, _first_frame, {"round_trips": startup_round_trips()})
+
+
+def startup_round_trips():
+    """
+    Sequential HTTP round trips before the first frame: overlapping requests
+    count once, so /show_tips/ + /groups/my in parallel is 1. main.py starts
+    background sync and group prefetch only after the first frame, so every
+    request counted here is on the startup path.
+    """
+    end = ((_first_frame or time.perf_counter()) - _t0) * 1e6
+    with _lock:
+        spans = sorted((e["ts"], e["ts"] + e["dur"]) for e in _events
+                       if e["cat"] == "http" and e["ts"] + e["dur"] <= end)
+    trips, busy_until = 0, None
+    for start, stop in spans:
+        if busy_until is None or start > busy_until:
+            trips += 1
+            busy_until = stop
+        else:
+            busy_until = max(busy_until, stop)
+    return trips
+
+
+def startup_summary():
+    """'first frame 412 ms after start, 1 round trip' (None before the first frame)"""
+    if _first_frame is None:
+        return None
+    trips = startup_round_trips()
+    return (f"first frame {(_first_frame - _t0) * 1000:.0f} ms after start, "
+            f"{trips} round trip{'' if trips == 1 else 's'}")
+
+
+def instrument_session(session):
+    """Wrap a requests.Session so every HTTP call becomes a span (only when enabled)"""
+    if not enabled:
+        return session
+    original = session.request
+
+    def request(method, url, *args, **kwargs):
+        path = url.split("://", 1)[-1]
+        path = "/" + path.split("/", 1)[1] if "/" in path else "/"
+        with span(f"http {method} {path.split('?')[0]}"):
+            return original(method, url, *args, **kwargs)
+
+    session.request = request
+    return session
+
+
+def summary(limit=4):
+    """One-line latency summary for the status bar: 'name avg/p95 ms · ...'"""
+    with _lock:
+        items = [(name, list(d)) for name, d in _stats.items()
+                 if d and name.startswith(SUMMARY_PREFIXES)]
+    # 最近最慢的几个放前面
+    items.sort(key=lambda kv: -max(kv[1]))
+    parts = []
+    for name, samples in items[:limit]:
+        samples.sort()
+        avg = sum(samples) / len(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        parts.append(f"{name} {avg:.0f}/{p95:.0f}ms")
+    return " · ".join(parts)
+
+
+def enable(trace_path="tips_trace.json", cprofile_path=None):
+    global enabled, _trace_path, _cprofile, _cprofile_path
+    enabled = True
+    _trace_path = trace_path
+    if cprofile_path:
+        import cProfile
+        _cprofile_path = cprofile_path
+        _cprofile = cProfile.Profile()
+        _cprofile.enable()
+
+
+def finish():
+    """Write the trace file (and cProfile dump); returns the paths written"""
+    global enabled, _cprofile
+    if not enabled:
+        return []
+    enabled = False
+    written = []
+    if _cprofile is not None:
+        _cprofile.disable()
+        _cprofile.dump_stats(_cprofile_path)
+        written.append(_cprofile_path)
+        _cprofile = None
+    if _trace_path:
+        with _lock:
+            trace = {"traceEvents": list(_events), "displayTimeUnit": "ms"}
+        with open(_trace_path, "w") as f:
+            json.dump(trace, f)
+        written.append(_trace_path)
+    return written
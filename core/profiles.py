@@ -0,0 +1,117 @@
+# core/profiles.py
+"""
+多账号 / 多服务器 (Named profiles)
+
+A profile is a server URL plus its own files: session cookies, tip snapshot,
+public key cache and offline write queue. Profiles come from config.PROFILES,
+plus PROFILES_FILE when it exists (no code change needed to add one):
+
+    {"staging": {"server_url": "https://staging.example"}, "alt": {}}
+
+`default` keeps the historical paths from config.py; every other profile
+lives in PROFILE_DIR/<name>/. A profile without server_url talks to SERVER_URL
+(another account on the same backend).
+
+ProfileSessions keeps one TipsClient (+ AsyncTipsClient) per profile for the
+life of the process, so switching back and forth reuses warm connection
+pools, tip caches and group caches instead of rebuilding them.
+"""
+import json
+import os
+import re
+
+from config import (
+    SERVER_URL, LOGIN_SESSION_CACHE_PATH, TIP_STORE_PATH, PUBLIC_KEY_CACHE_PATH,
+    WRITE_JOURNAL_PATH, DEFAULT_PROFILE, PROFILES, PROFILES_FILE, PROFILE_DIR,
+)
+
+_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class Profile:
+    __slots__ = ("name", "server_url", "session_path", "store_path", "key_cache_path", "journal_path")
+
+    def __init__(self, name, server_url=SERVER_URL):
+        self.name = name
+        self.server_url = server_url.rstrip("/")
+        if name == DEFAULT_PROFILE:
+            self.session_path = LOGIN_SESSION_CACHE_PATH
+            self.store_path = TIP_STORE_PATH
+            self.key_cache_path = PUBLIC_KEY_CACHE_PATH
+            self.journal_path = WRITE_JOURNAL_PATH
+        else:
+            base = os.path.join(PROFILE_DIR, name)
+            self.session_path = os.path.join(base, "session_cache")
+            self.store_path = os.path.join(base, "tips_store.db")
+            self.key_cache_path = os.path.join(base, "key_cache")
+            self.journal_path = os.path.join(base, "write_journal.jsonl")
+
+    def ensure_dir(self):
+        """named profile 的目录第一次用到时才建"""
+        parent = os.path.dirname(self.session_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+    def __repr__(self):
+        return f"Profile({self.name!r}, {self.server_url!r})"
+
+
+def load_profiles(path=PROFILES_FILE):
+    """name -> Profile: config.PROFILES, overridden / extended by `path`"""
+    specs = {name: dict(spec) for name, spec in PROFILES.items()}
+    try:
+        with open(path, "r") as f:
+            extra = json.load(f)
+    except OSError:
+        extra = {}
+    except ValueError as e:
+        raise ValueError(f"Bad profiles file {path}: {e}")
+    for name, spec in extra.items():
+        specs.setdefault(name, {}).update(spec or {})
+
+    profiles = {}
+    for name, spec in specs.items():
+        if not _NAME.match(name):
+            raise ValueError(f"Bad profile name {name!r} (letters, digits, _ and - only)")
+        profiles[name] = Profile(name, spec.get("server_url") or SERVER_URL)
+    return profiles
+
+
+def get_profile(name=None):
+    """Profile by name (None -> default); ValueError for an unknown name"""
+    name = name or DEFAULT_PROFILE
+    profiles = load_profiles()
+    if name not in profiles:
+        raise ValueError(f"Unknown profile {name!r} (known: {', '.join(sorted(profiles))})")
+    return profiles[name]
+
+
+class ProfileSessions:
+    def __init__(self, active=DEFAULT_PROFILE):
+        self.active = active
+        self._sessions = {}     # name -> (TipsClient, AsyncTipsClient)
+
+    def names(self):
+        return sorted(load_profiles())
+
+    def add(self, name, client, aclient):
+        self._sessions[name] = (client, aclient)
+
+    def is_open(self, name):
+        return name in self._sessions
+
+    def get(self, name):
+        """(client, aclient) of a profile, created on first use and kept afterwards"""
+        session = self._sessions.get(name)
+        if session is None:
+            from core.client import TipsClient
+            from core.async_client import AsyncTipsClient
+            client = TipsClient(profile=get_profile(name))
+            session = self._sessions[name] = (client, AsyncTipsClient(client))
+        return session
+
+    def close(self):
+        for client, aclient in self._sessions.values():
+            client.stop_sync()
+            aclient.close()
+        self._sessions.clear()
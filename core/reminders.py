@@ -0,0 +1,243 @@
+# core/reminders.py
+"""
+截止提醒 (Deadline reminder scheduler)
+
+    reminders = ReminderScheduler(client.local_cache, on_alert)
+    reminders.start()       # on_alert([(tip, time_left), ...]) from the reminder thread
+
+Every pending (not done, future) deadline gets one heap entry per configured
+offset before it (REMINDER_OFFSETS). The thread sleeps until the earliest
+entry is due, so a tick costs O(log n) for the alerts that fire, never a scan
+over all tips.
+
+The heap follows the TipCache change listener: a changed tip gets a new
+generation and fresh entries, the old ones are skipped when they surface
+(and the heap is compacted once stale entries outnumber live ones).
+Offsets that already passed when a tip is (re)scheduled collapse into one
+immediate catch-up alert, and each (tip, deadline, offset) fires at most once,
+so a sync or a full reload does not repeat reminders. Optimistic placeholders
+(temp ids) are not scheduled: the tip is reminded once it comes back from the
+server with its real id. Alerts that come due together (e.g. the catch-ups at
+startup) are delivered in one on_alert call.
+"""
+import heapq
+import itertools
+import shlex
+import subprocess
+import threading
+from datetime import datetime, timedelta
+
+from config import REMINDER_OFFSETS, REMINDER_MAX_SLEEP
+from core.journal import is_temp_id
+
+
+def _key(tip):
+    """Stable identity across syncs: real_id, or the index for tips without one"""
+    return tip.real_id if tip.real_id is not None else ("index", tip.index)
+
+
+def format_left(left):
+    """timedelta -> '2 d' / '3 h' / '10 min' / 'now'"""
+    seconds = left.total_seconds()
+    if seconds >= 2 * 86400:
+        return f"{seconds // 86400:.0f} d"
+    if seconds >= 2 * 3600:
+        return f"{seconds // 3600:.0f} h"
+    if seconds >= 60:
+        return f"{seconds // 60:.0f} min"
+    return "now"
+
+
+def desktop_notify(command, title, body):
+    """Run the desktop-notify hook (e.g. `notify-send`) with title and body; never blocks or raises"""
+    argv = shlex.split(command) if isinstance(command, str) else list(command)
+    try:
+        subprocess.Popen(argv + [title, body], stdin=subprocess.DEVNULL,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        pass
+
+
+class ReminderScheduler:
+    def __init__(self, cache, on_alert, offsets=REMINDER_OFFSETS, clock=datetime.now,
+                 max_sleep=REMINDER_MAX_SLEEP):
+        self.cache = cache
+        self.on_alert = on_alert
+        # 大的在前：补发时落到已经过去的最小那个
+        self.offsets = sorted({timedelta(seconds=s) for s in offsets}, reverse=True)
+        self.clock = clock
+        # 系统休眠 / 改时间后最多这么久就重新看一眼
+        self.max_sleep = max_sleep
+
+        self._cond = threading.Condition()
+        self._heap = []         # (fire_at, seq, key, gen, offset)
+        self._seq = itertools.count()
+        self._gens = itertools.count(1)
+        self._live = {}         # key -> (gen, ddl_dt) of the scheduled tips
+        self._fired = {}        # key -> (ddl_dt, set of offsets already alerted)
+        self._stale = 0
+        self._stopped = False
+        self._thread = None
+
+        with self._cond:
+            self._rebuild(cache, self.clock())
+        cache.add_listener(self._on_change)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tips-reminders", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self.cache.remove_listener(self._on_change)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def pending(self):
+        """Number of tips with reminders still to come"""
+        return len(self._live)
+
+    def next_due(self):
+        """When the next live entry fires (None when nothing is scheduled)"""
+        with self._cond:
+            self._drop_stale_top()
+            return self._heap[0][0] if self._heap else None
+
+    # === 调度 ===
+    def _unschedule(self, key):
+        if self._live.pop(key, None) is not None:
+            self._stale += len(self.offsets)
+
+    def _schedule(self, tip, now, bulk=False):
+        key = _key(tip)
+        self._unschedule(key)
+        ddl = tip.ddl_dt
+        # 本地占位 tip 不提醒：同步回来的真 tip 会换 key，两个都提醒就重复了
+        if tip.is_done or ddl is None or ddl <= now or is_temp_id(tip.real_id):
+            return
+
+        fired = self._fired.get(key)
+        done = fired[1] if fired is not None and fired[0] == ddl else ()
+        gen = next(self._gens)
+        entries, catch_up = [], None
+        for offset in self.offsets:
+            if offset in done:
+                continue
+            fire_at = ddl - offset
+            if fire_at > now:
+                entries.append((fire_at, next(self._seq), key, gen, offset))
+            else:
+                catch_up = offset
+        if catch_up is not None:
+            entries.append((now, next(self._seq), key, gen, catch_up))
+        if not entries:
+            return
+
+        self._live[key] = (gen, ddl)
+        if bulk:
+            self._heap.extend(entries)
+        else:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+
+    def _rebuild(self, tips, now):
+        """Full reload: schedule everything, heapify once"""
+        self._heap = []
+        self._live = {}
+        self._stale = 0
+        keys = set()
+        for tip in tips:
+            keys.add(_key(tip))
+            self._schedule(tip, now, bulk=True)
+        heapq.heapify(self._heap)
+        # 不在缓存里的 tip 不用再记着提醒过没有
+        self._fired = {key: value for key, value in self._fired.items() if key in keys}
+
+    def _compact(self):
+        self._heap = [e for e in self._heap if self._live.get(e[2], (None,))[0] == e[3]]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def _drop_stale_top(self):
+        heap = self._heap
+        while heap and self._live.get(heap[0][2], (None,))[0] != heap[0][3]:
+            heapq.heappop(heap)
+            self._stale = max(0, self._stale - 1)
+
+    def _on_change(self, changed, removed, reset):
+        with self._cond:
+            now = self.clock()
+            if reset:
+                self._rebuild(changed, now)
+            else:
+                # 换了下标的 tip 同时出现在两边：别把它提醒过的记录清掉
+                kept = {_key(tip) for tip in changed}
+                for tip in removed:
+                    key = _key(tip)
+                    if key in kept:
+                        continue
+                    self._unschedule(key)
+                    self._fired.pop(key, None)
+                for tip in changed:
+                    self._schedule(tip, now)
+                if self._stale > 64 and self._stale > len(self._heap) // 2:
+                    self._compact()
+            # 最早的那个可能变了，叫醒线程重新算要睡多久
+            self._cond.notify()
+
+    # === 线程 ===
+    def _due(self, now):
+        """Pop every live entry due at `now` -> [(key, ddl_dt, offset)]"""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, key, gen, offset = heapq.heappop(heap)
+            live = self._live.get(key)
+            if live is None or live[0] != gen:
+                self._stale = max(0, self._stale - 1)
+                continue
+            ddl = live[1]
+            fired = self._fired.get(key)
+            if fired is None or fired[0] != ddl:
+                fired = self._fired[key] = (ddl, set())
+            # 补发的那一次也算上更早的几个
+            fired[1].update(o for o in self.offsets if o >= offset)
+            if offset == self.offsets[-1]:
+                # 最后一个提醒发完，这条 tip 不用再跟踪
+                del self._live[key]
+            due.append((key, ddl, offset))
+        return due
+
+    def _lookup(self, key):
+        if isinstance(key, tuple):
+            return self.cache.by_index(key[1])
+        return self.cache.by_real_id(key)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = self.clock()
+                due = self._due(now)
+                if not due:
+                    self._drop_stale_top()
+                    timeout = self.max_sleep
+                    if self._heap:
+                        timeout = min(timeout, max(0.0, (self._heap[0][0] - now).total_seconds()))
+                    self._cond.wait(timeout)
+                    continue
+
+            alerts = []
+            for key, ddl, offset in due:
+                tip = self._lookup(key)
+                # 出堆和回调之间缓存可能又变了
+                if tip is not None and not tip.is_done and tip.ddl_dt == ddl:
+                    alerts.append((tip, ddl - now))
+            if alerts:
+                try:
+                    self.on_alert(alerts)
+                except Exception:
+                    pass
@@ -0,0 +1,231 @@
+# core/search.py
+"""
+倒排索引搜索 (Inverted-index search and filters over the TipCache)
+
+    index = SearchIndex(client.local_cache)
+    index.query("周报 due:<24h done:no group:5")
+
+Text terms are matched (AND) against tip content, owner and group name:
+latin words / numbers as whole lowercase tokens, CJK text as overlapping
+bigrams (plus single characters, so one-character queries work too).
+Structured filters:
+
+    done:yes | done:no
+    group:5  | group:private
+    due:<24h | due:>3d  (m/h/d/w; measured from now, overdue tips excluded)
+    due:overdue | due:none
+
+The index subscribes to the cache's change listener and updates only the
+tips that changed; a full reload re-indexes everything. Queries intersect
+posting sets starting from the smallest one, and deadlines are kept in a
+sorted list so `due:` ranges are two bisects.
+"""
+import re
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from core.cache import group_key
+from core.tip import GROUP
+
+_WORD = re.compile(r"[0-9a-z_]+|[㐀-鿿豈-﫿]+")
+_CJK_START = "㐀"
+_DUE = re.compile(r"^([<>])(\d+)([mhdw])$")
+_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+@lru_cache(maxsize=65536)
+def _run_tokens(run):
+    """Tokens of one lowercase word / CJK run (phrases repeat across tips, so cached)"""
+    if run[0] < _CJK_START:
+        return (run,)
+    return tuple(set(run).union(map(str.__add__, run, run[1:])))
+
+
+@lru_cache(maxsize=8192)
+def _field_tokens(text):
+    """Owner / group names: a handful of distinct values, tokenized once each"""
+    return tokenize(text)
+
+
+def tokenize(text):
+    """Lowercase word tokens + CJK unigrams and bigrams"""
+    if not text:
+        return frozenset()
+    tokens = set()
+    for run in _WORD.findall(text.lower()):
+        tokens.update(_run_tokens(run))
+    return frozenset(tokens)
+
+
+def _query_tokens(text):
+    """查询词：CJK 有两个字以上时只用 bigram，更精确也更快"""
+    tokens = set()
+    for run in _WORD.findall(text.lower()):
+        if run[0] < _CJK_START or len(run) == 1:
+            tokens.add(run)
+        else:
+            tokens.update(map(str.__add__, run, run[1:]))
+    return tokens
+
+
+class SearchIndex:
+    def __init__(self, cache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        with self._lock:
+            self._rebuild(cache)
+        cache.add_listener(self._on_change)
+
+    def close(self):
+        self.cache.remove_listener(self._on_change)
+
+    # === 索引维护 ===
+    def _reset(self):
+        self._docs = {}         # index -> (tip, tokens)
+        self._by_rid = {}       # real_id -> index
+        self._postings = {}     # token -> set(index)
+        self._done = set()
+        self._undone = set()
+        self._groups = {}       # group key -> set(index)
+        self._private = set()
+        self._due = []          # sorted (ddl_dt, index)
+        self._no_due = set()
+
+    def _rebuild(self, tips):
+        self._reset()
+        for tip in tips:
+            self._add(tip, sort_due=False)
+        # 批量建索引时最后排一次序，不逐条 insort
+        self._due.sort()
+
+    def _add(self, tip, sort_due=True):
+        idx = tip.index
+        tokens = tokenize(tip.content)
+        if tip.type == GROUP:
+            tokens = tokens | _field_tokens(tip.owner) | _field_tokens(tip.group_name)
+            self._groups.setdefault(group_key(tip.group_id), set()).add(idx)
+        else:
+            self._private.add(idx)
+        postings = self._postings
+        for tok in tokens:
+            posting = postings.get(tok)
+            if posting is None:
+                postings[tok] = {idx}
+            else:
+                posting.add(idx)
+        (self._done if tip.is_done else self._undone).add(idx)
+        if tip.ddl_dt is None:
+            self._no_due.add(idx)
+        elif sort_due:
+            insort(self._due, (tip.ddl_dt, idx))
+        else:
+            self._due.append((tip.ddl_dt, idx))
+        self._docs[idx] = (tip, tokens)
+        if tip.real_id is not None:
+            self._by_rid[tip.real_id] = idx
+
+    def _remove(self, idx):
+        doc = self._docs.pop(idx, None)
+        if doc is None:
+            return
+        tip, tokens = doc
+        for tok in tokens:
+            posting = self._postings.get(tok)
+            if posting is not None:
+                posting.discard(idx)
+                if not posting:
+                    del self._postings[tok]
+        self._done.discard(idx)
+        self._undone.discard(idx)
+        self._private.discard(idx)
+        self._no_due.discard(idx)
+        if tip.type == GROUP:
+            self._groups.get(group_key(tip.group_id), set()).discard(idx)
+        if tip.ddl_dt is not None:
+            pos = bisect_left(self._due, (tip.ddl_dt, idx))
+            if pos < len(self._due) and self._due[pos] == (tip.ddl_dt, idx):
+                del self._due[pos]
+        if self._by_rid.get(tip.real_id) == idx:
+            del self._by_rid[tip.real_id]
+
+    def _on_change(self, changed, removed, reset):
+        with self._lock:
+            if reset:
+                self._rebuild(changed)
+                return
+            for tip in removed:
+                doc = self._docs.get(tip.index)
+                if doc is not None and doc[0] is tip:
+                    self._remove(tip.index)
+            for tip in changed:
+                # 同一条 tip 可能换了下标，旧下标上的也要清掉
+                old = self._by_rid.get(tip.real_id) if tip.real_id is not None else None
+                if old is not None and old != tip.index:
+                    self._remove(old)
+                self._remove(tip.index)
+                self._add(tip)
+
+    # === 查询 ===
+    def _due_range(self, value, now):
+        if value == "overdue":
+            return {idx for _, idx in self._due[:bisect_left(self._due, (now,))]}
+        if value == "none":
+            return self._no_due
+        m = _DUE.match(value)
+        if not m:
+            raise ValueError(f"Bad filter due:{value} (try due:<24h, due:>3d, due:overdue, due:none)")
+        edge = now + timedelta(**{_UNITS[m.group(3)]: int(m.group(2))})
+        start = bisect_left(self._due, (now,))
+        split = bisect_left(self._due, (edge,))
+        part = self._due[start:split] if m.group(1) == "<" else self._due[split:]
+        return {idx for _, idx in part}
+
+    def _filter(self, key, value, now):
+        """Index set for one filter (may be an internal set: never mutate it)"""
+        if key == "done":
+            if value in ("yes", "y", "1", "true"):
+                return self._done
+            if value in ("no", "n", "0", "false"):
+                return self._undone
+            raise ValueError(f"Bad filter done:{value} (done:yes / done:no)")
+        if key == "group":
+            if value == "private":
+                return self._private
+            return self._groups.get(group_key(value), set())
+        if key == "due":
+            return self._due_range(value, now)
+        raise ValueError(f"Unknown filter {key}: (done:, group:, due:)")
+
+    def query(self, text, now=None, limit=None):
+        """Tips matching every term and filter in `text`, in index order"""
+        now = now or datetime.now()
+        terms, filters = [], []
+        for part in text.split():
+            key, sep, value = part.partition(":")
+            if sep and value and key.lower() in ("done", "group", "due"):
+                filters.append((key.lower(), value.lower()))
+            else:
+                terms.append(part)
+
+        with self._lock:
+            sets = [self._filter(key, value, now) for key, value in filters]
+            for tok in _query_tokens(" ".join(terms)):
+                posting = self._postings.get(tok)
+                if not posting:
+                    return []
+                sets.append(posting)
+            if not sets:
+                hits = self._docs.keys()
+            else:
+                sets.sort(key=len)
+                hits = set(sets[0])
+                for other in sets[1:]:
+                    hits &= other
+                    if not hits:
+                        break
+            result = sorted(hits)
+            if limit is not None:
+                result = result[:limit]
+            return [self._docs[idx][0] for idx in result]
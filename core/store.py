@@ -0,0 +1,141 @@
+# core/store.py
+"""
+本地持久化 (Persistent on-disk tip store)
+
+Snapshots local_cache / group context / sync cursor into SQLite so the UI can
+draw the last known state before the network answers.
+Every row is keyed by username, so several accounts can share one file.
+
+save() rewrites a user's whole snapshot; save_changes() writes only the tips
+a sync changed or deleted (the usual case once a snapshot exists).
+"""
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    username           TEXT PRIMARY KEY,
+    user_id            INTEGER,
+    current_group_id   INTEGER,
+    current_group_name TEXT,
+    sync_cursor        TEXT,
+    updated_at         REAL
+);
+CREATE TABLE IF NOT EXISTS tips (
+    username TEXT NOT NULL,
+    idx      INTEGER NOT NULL,
+    data     TEXT NOT NULL,
+    PRIMARY KEY (username, idx)
+);
+CREATE TABLE IF NOT EXISTS groups (
+    username TEXT NOT NULL,
+    group_id INTEGER NOT NULL,
+    name     TEXT,
+    PRIMARY KEY (username, group_id)
+);
+"""
+
+
+class TipStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # 后台同步线程也会写入，所以不绑定创建线程
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._migrate()
+
+    def _migrate(self):
+        """本地库只是缓存：版本不一致时直接重建"""
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.executescript(
+                    "DROP TABLE IF EXISTS meta;"
+                    "DROP TABLE IF EXISTS tips;"
+                    "DROP TABLE IF EXISTS groups;"
+                )
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def load(self, username):
+        """Return the last snapshot for `username` (tips as dicts), or None if there is none"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, current_group_id, current_group_name, sync_cursor "
+                "FROM meta WHERE username = ?", (username,)
+            ).fetchone()
+            if row is None:
+                return None
+            tips = [json.loads(data) for (data,) in self._conn.execute(
+                "SELECT data FROM tips WHERE username = ? ORDER BY idx", (username,)
+            )]
+            groups = dict(self._conn.execute(
+                "SELECT group_id, name FROM groups WHERE username = ?", (username,)
+            ).fetchall())
+
+        return {
+            'user_id': row[0],
+            'current_group_id': row[1],
+            'current_group_name': row[2],
+            'sync_cursor': row[3],
+            'tips': tips,
+            'groups': groups,
+        }
+
+    def save(self, username, user_id, tips, current_group_id, current_group_name, sync_cursor):
+        """Replace the snapshot for `username` in one transaction (`tips`: core.tip.Tip)"""
+        groups = {}
+        for t in tips:
+            if t.group_id is not None and t.group_name:
+                groups[t.group_id] = t.group_name
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?, ?, ?)",
+                (username, user_id, current_group_id, current_group_name, sync_cursor, time.time())
+            )
+            self._conn.execute("DELETE FROM tips WHERE username = ?", (username,))
+            self._conn.executemany(
+                "INSERT INTO tips VALUES (?, ?, ?)",
+                ((username, t.index, json.dumps(t.to_dict(), ensure_ascii=False)) for t in tips)
+            )
+            self._conn.execute("DELETE FROM groups WHERE username = ?", (username,))
+            self._conn.executemany(
+                "INSERT INTO groups VALUES (?, ?, ?)",
+                ((username, gid, name) for gid, name in groups.items())
+            )
+
+    def save_changes(self, username, user_id, changed, removed, current_group_id,
+                     current_group_name, sync_cursor):
+        """Update the snapshot in one transaction: upsert `changed` tips, delete the `removed` indexes"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?, ?, ?)",
+                (username, user_id, current_group_id, current_group_name, sync_cursor, time.time())
+            )
+            self._conn.executemany(
+                "DELETE FROM tips WHERE username = ? AND idx = ?",
+                ((username, idx) for idx in removed)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tips VALUES (?, ?, ?)",
+                ((username, t.index, json.dumps(t.to_dict(), ensure_ascii=False)) for t in changed)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO groups VALUES (?, ?, ?)",
+                ((username, t.group_id, t.group_name) for t in changed
+                 if t.group_id is not None and t.group_name)
+            )
+
+    def clear(self, username):
+        with self._lock, self._conn:
+            for table in ("meta", "tips", "groups"):
+                self._conn.execute(f"DELETE FROM {table} WHERE username = ?", (username,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,88 @@
+# core/sync.py
+"""
+后台同步 (Background auto-refresh worker)
+
+A daemon thread that keeps local_cache in step with the server:
+
+- polls with delta fetches at an adaptive interval: back to the minimum
+  after a change, doubling (up to the maximum) while nothing changes,
+  and backing off the same way on errors;
+- when the backend announces long-poll support (`"long_poll": true` in a
+  /show_tips/ reply) it instead keeps one `?since=..&wait=N` request open,
+  so changes arrive as soon as the server has them;
+- `trigger()` wakes it immediately (the `r` command) without blocking the prompt.
+
+`on_change(msg)` is called only when the cache actually changed, or when a
+sync asked for via trigger() finished (so the user gets feedback).
+"""
+import threading
+
+from config import SYNC_MIN_INTERVAL, SYNC_MAX_INTERVAL, SYNC_LONG_POLL_WAIT
+
+
+class SyncWorker:
+    def __init__(self, client, on_change=None,
+                 min_interval=SYNC_MIN_INTERVAL, max_interval=SYNC_MAX_INTERVAL,
+                 long_poll_wait=SYNC_LONG_POLL_WAIT):
+        self.client = client
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.long_poll_wait = long_poll_wait
+
+        self.interval = min_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._requested = False
+        self._thread = None
+
+    def start(self, immediate=False):
+        """immediate=False: 第一次同步等一个 interval (启动时刚拉过)"""
+        if self._thread is None:
+            self._requested = immediate
+            self._thread = threading.Thread(target=self._run, name="tips-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self):
+        """马上同步一次 (不等 interval)"""
+        self._requested = True
+        self._wake.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and not self._stop.is_set()
+
+    def _run(self):
+        delay = 0 if self._requested else self.interval
+        while not self._stop.is_set():
+            if delay:
+                self._wake.wait(delay)
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+
+            requested, self._requested = self._requested, False
+            use_long_poll = self.client.server_long_poll and not requested
+
+            before = self.client.local_cache.version
+            msg, ok = self.client.fetch_tips(wait=self.long_poll_wait if use_long_poll else None)
+            changed = self.client.local_cache.version != before
+
+            if self._stop.is_set():
+                break
+            if (changed or requested) and self.on_change:
+                self.on_change(msg)
+
+            if ok and self.client.server_long_poll:
+                # 长轮询本身就会等，直接发下一轮
+                delay = 0
+                continue
+            if ok and changed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * 2, self.max_interval)
+            delay = self.interval
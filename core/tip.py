@@ -0,0 +1,111 @@
+# core/tip.py
+"""
+紧凑的 Tip 模型 (Compact slotted tip record)
+
+One `Tip` per cached tip instead of an 8-10 key dict: attributes live in
+__slots__, repeated strings (type, group name, owner, member names) are
+interned, and the deadline is parsed once when the tip is built
+(see core/deadline.py).
+"""
+import sys
+from core.deadline import parse_ddl, server_parser, store_parser
+
+PRIVATE = 'PRIVATE'
+GROUP = 'GROUP'
+
+_NO_MEMBERS = ()
+_UNSET = object()
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Tip:
+    __slots__ = (
+        'index', 'real_id', 'content', 'ddl', 'ddl_dt', 'is_done',
+        'type', 'group_id', 'group_name', 'owner', 'completed_members',
+    )
+
+    def __init__(self, index, real_id, content, ddl, is_done, type=PRIVATE,
+                 group_id=None, group_name=None, owner=None, completed_members=_NO_MEMBERS,
+                 ddl_dt=_UNSET):
+        self.index = index
+        self.real_id = real_id
+        self.content = content
+        self.ddl = ddl
+        self.ddl_dt = parse_ddl(ddl) if ddl_dt is _UNSET else ddl_dt
+        self.is_done = is_done
+        self.type = _intern(type)
+        self.group_id = group_id
+        self.group_name = _intern(group_name)
+        self.owner = _intern(owner)
+        # 大部分 tip 没人完成，共享同一个空 tuple
+        self.completed_members = tuple(map(_intern, completed_members)) if completed_members else _NO_MEMBERS
+
+    @property
+    def is_group(self):
+        return self.type == GROUP
+
+    @classmethod
+    def from_private(cls, raw, real_id):
+        """Build from one entry of /show_tips/ `private_tips`"""
+        return cls(raw['index'], real_id, raw['content'], raw['ddl'], raw['is_done'],
+                   ddl_dt=server_parser.parse(raw['ddl']))
+
+    @classmethod
+    def from_public(cls, raw, real_id):
+        """Build from one entry of /show_tips/ `public_tips`"""
+        return cls(
+            raw['index'], real_id, raw['content'], raw['ddl'], raw['is_done'], GROUP,
+            group_id=raw.get('group_id'),
+            group_name=raw.get('group_name', 'Unknown'),
+            owner=raw.get('owner_name', 'Unknown'),
+            completed_members=raw.get('completed_members') or _NO_MEMBERS,
+            ddl_dt=server_parser.parse(raw['ddl']),
+        )
+
+    def copy(self, **changes):
+        """Shallow copy with some attributes replaced (cached tips are never mutated in place)"""
+        new = Tip.__new__(Tip)
+        for name in Tip.__slots__:
+            setattr(new, name, getattr(self, name))
+        for name, value in changes.items():
+            setattr(new, name, value)
+        return new
+
+    def same_as(self, other):
+        """Every field equal (a full reload that brings back the same tip is not a change)"""
+        return all(getattr(self, name) == getattr(other, name) for name in Tip.__slots__)
+
+    def to_dict(self):
+        """JSON-friendly form (local store, scripting output)"""
+        data = {
+            'index': self.index,
+            'real_id': self.real_id,
+            'content': self.content,
+            'ddl': self.ddl,
+            'is_done': self.is_done,
+            'type': self.type,
+            'group_id': self.group_id,
+            'completed_members': list(self.completed_members),
+        }
+        if self.type == GROUP:
+            data['group_name'] = self.group_name
+            data['owner'] = self.owner
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['index'], data.get('real_id'), data.get('content', ''), data.get('ddl'),
+            data.get('is_done', False), data.get('type', PRIVATE),
+            group_id=data.get('group_id'),
+            group_name=data.get('group_name'),
+            owner=data.get('owner'),
+            completed_members=data.get('completed_members') or _NO_MEMBERS,
+            ddl_dt=store_parser.parse(data.get('ddl')),
+        )
+
+    def __repr__(self):
+        return f"Tip(index={self.index}, real_id={self.real_id}, type={self.type}, content={self.content!r})"
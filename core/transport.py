@@ -0,0 +1,135 @@
+# core/transport.py
+"""
+HTTP 传输层 (Resilient transport under TipsClient)
+
+TransportSession is a drop-in requests.Session that adds
+- sized connection pools (HTTP_POOL_*),
+- compression negotiation: Accept-Encoding lists every encoding urllib3 can
+  decode here (gzip, deflate, plus br / zstd when brotli / zstandard are installed),
+- a default (connect, read) timeout per endpoint (HTTP_TIMEOUTS), so no call
+  can hang forever; long-poll requests get `wait` + HTTP_LONG_POLL_MARGIN,
+- retries with jittered exponential backoff for idempotent requests (GET/HEAD)
+  on connection errors, timeouts and 429/502/503/504,
+- a circuit breaker: after BREAKER_FAILURES consecutive failures requests fail
+  immediately with CircuitOpenError (a requests.ConnectionError, so existing
+  error handling applies and the UI keeps showing the cached tips) until
+  BREAKER_RESET seconds have passed and a trial request succeeds.
+
+Explicit `timeout=` arguments still win.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_TIMEOUTS, HTTP_LONG_POLL_MARGIN,
+    HTTP_READ_RETRIES, HTTP_RETRY_BACKOFF, BREAKER_FAILURES, BREAKER_RESET,
+)
+
+IDEMPOTENT = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUS = {429, 502, 503, 504}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Backend marked as down; the request was not sent"""
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.state = self.CLOSED
+        self._count = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """May a request go out now? (OPEN -> HALF_OPEN lets exactly one through)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_after:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._count = 0
+
+    def failure(self):
+        with self._lock:
+            self._count += 1
+            if self.state == self.HALF_OPEN or self._count >= self.failures:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def retry_in(self):
+        """Seconds until the next trial request (0 when not open)"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0
+            return max(0.0, self.reset_after - (time.monotonic() - self._opened_at))
+
+
+def endpoint_timeout(path, params=None, timeouts=HTTP_TIMEOUTS):
+    """(connect, read) timeout for a request path; longest matching prefix wins"""
+    best = None
+    for prefix in timeouts:
+        if prefix != "default" and path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    connect, read = timeouts[best or "default"]
+    if isinstance(params, dict) and params.get("wait"):
+        read = max(read, float(params["wait"]) + HTTP_LONG_POLL_MARGIN)
+    return connect, read
+
+
+class TransportSession(requests.Session):
+    def __init__(self, retries=HTTP_READ_RETRIES, backoff=HTTP_RETRY_BACKOFF, breaker=None):
+        super().__init__()
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        # requests 默认只声明 gzip, deflate
+        self.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = endpoint_timeout(urlsplit(url).path, kwargs.get("params"))
+        attempts = 1 + (self.retries if method.upper() in IDEMPOTENT else 0)
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    f"Server unavailable, retrying in {self.breaker.retry_in():.0f}s")
+            last = attempt == attempts - 1
+            try:
+                resp = super().request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.breaker.failure()
+                if last:
+                    raise
+            except Exception:
+                # 其它异常也要结算：否则半开状态的试探请求永远不会结束
+                self.breaker.failure()
+                raise
+            else:
+                if resp.status_code >= 500:
+                    self.breaker.failure()
+                else:
+                    self.breaker.success()
+                if last or resp.status_code not in RETRY_STATUS:
+                    return resp
+                resp.close()
+            time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
@@ -80,7 +80,8 @@ LAUNCHER_PATH="/usr/local/bin/tips"
 
 cat << EOF > tips_launcher.temp
 #!/bin/bash
-# 进入项目目录
+# 记下调用者的目录 (import / export 的相对路径按它解析)，再进入项目目录
+export TIPS_CALLER_CWD="\$PWD"
 cd "$PROJECT_DIR"
 # 使用虚拟环境中的 Python 运行 main.py
 "$PROJECT_DIR/venv/bin/python" main.py "\$@"
@@ -0,0 +1,41 @@
+import asyncio
+from getpass import getpass
+
+def login(client, aclient):
+    """
+    先用缓存的 session 自动登录，不行再问账号密码。Returns True when logged in.
+    (TUI 里切换到一个还没登录的 profile 时也走这里)
+    """
+    print(f"Checking existing session ({client.profile.name}: {client.server_url})...")
+    # 先读 session 文件和本地快照（都不走网络）
+    try:
+        client.load_session_file()
+    except Exception:
+        client.forget_session()
+    has_snapshot, _ = client.load_local_state()
+
+    # 乐观地直接拉 tips (401 = session 过期)，同时预取群组列表：一个 RTT
+    auto_success, auto_msg = asyncio.run(aclient.auto_login(has_snapshot=has_snapshot))
+    if auto_success:
+        print(f"✅ {auto_msg}")
+        # 自动登录成功，直接往下走，不用输入账号密码了
+        return True
+
+    print(f"⚠️ {auto_msg}. Please login manually.")
+    print("--- Login ---")
+    u = input("User: ").strip()
+    if not u:
+        print("Empty username. Exiting.")
+        return False
+    p = getpass("Pass: ").strip()
+    if u == "admin":
+        print("Admin 你妈的逼")
+        return False
+    success, msg = client.login(u, p)
+    if not success:
+        print(f"\nLogin Failed: {msg}")
+        return False
+    client.load_local_state()
+    # 初始拉取 (有快照时是 delta) 和群组列表并发
+    asyncio.run(aclient.warm_up())
+    return True
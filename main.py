@@ -1,60 +1,92 @@
 # main.py
+# 启动要快：这里只导入自动登录路径真正用到的模块。
+# rich / readline (TUI) 等进入 TUI 再导入，cryptography 只在登录/注册加密时导入
+# (见 core/crypto.py)。预算检查: python -m benchmarks.importtime
+# `tips ls/add/...` 这类一次性命令走 cli.py，连 asyncio 都不需要
 import sys
-import readline
-import signup
-from core.client import TipsClient
-from core.CommandHandler import CommandHandler # 引入刚才写的处理器
-from ui import renderer, style
-from getpass import getpass
+from core.profiles import get_profile, ProfileSessions
+from core import profiler
+from ui import style
+
+def _option(args, name):
+    """--name VALUE -> VALUE (没给就是 None)，并从 args 里拿掉"""
+    if name in args:
+        i = args.index(name)
+        args.pop(i)
+        if i < len(args):
+            return args.pop(i)
+    return None
 
 def main():
-    if len(sys.argv) > 1 and sys.argv[1] == '--signup':
+    args = sys.argv[1:]
+    # --profile [--profile-out trace.json] [--cprofile out.prof]
+    if '--profile' in args:
+        args.remove('--profile')
+        trace_path = _option(args, '--profile-out') or "tips_trace.json"
+        profiler.enable(trace_path, cprofile_path=_option(args, '--cprofile'))
+
+    # --profile-name NAME: 用哪个账号 / 服务器 (config.PROFILES 或 .profiles.json)
+    try:
+        profile = get_profile(_option(args, '--profile-name'))
+    except ValueError as e:
+        print(e)
+        sys.exit(2)
+
+    if args and args[0] == '--signup':
+        import signup
         try:
-            signup.signup() 
+            signup.signup(profile) 
         except KeyboardInterrupt:
             print("\n已取消注册。")
         return 
-    
-    client = TipsClient()
+
+    if args:
+        # 一次性命令: tips ls / add / done / rm / groups ... (以及 tips --help)
+        import cli
+        sys.exit(cli.run(args, profile=profile))
+
+    # 每个 profile 一套 client (连接池 / 缓存)，TUI 里切换时复用
+    sessions = ProfileSessions(profile.name)
+    client, aclient = sessions.get(profile.name)
     in_tui_mode = False 
+    handler = None
 
     try:
         # --- 登录阶段 ---
-        print("Checking existing session...")
-        auto_success, auto_msg = client.try_auto_login()
-        
-        if auto_success:
-            print(f"✅ {auto_msg}")
-            # 自动登录成功，直接往下走，不用输入账号密码了
-        else:
-            print(f"⚠️ {auto_msg}. Please login manually.")
-            print("--- Login ---")
-            u = input("User: ").strip()
-            if not u: 
-                print("Empty username. Exiting.")
-                return
-            p = getpass("Pass: ").strip()
-            if u == "admin":
-                print("Admin 你妈的逼")
-                return
-            success, msg = client.login(u, p)
-            if not success:
-                print(f"\nLogin Failed: {msg}")
-                return
-        
-        # --- TUI 初始化 ---
+        import login
+        if not login.login(client, aclient):
+            return
+
+        # --- TUI 初始化 (这时才加载 rich / readline) ---
+        import readline  # noqa: F401  (让 input() 支持行编辑/历史)
+        from core.CommandHandler import CommandHandler
+        from ui import renderer
         sys.stdout.write(style.Term.ALT_SCREEN_ON)
         in_tui_mode = True  
-        client.fetch_tips() # 初始拉取
         
         # 初始化处理器
-        handler = CommandHandler(client, renderer)
+        handler = CommandHandler(client, renderer, aclient, sessions)
+
+        # 后台自动同步；启动时没拉成功 (离线) 就先画快照，后台马上重试
+        offline = not client.last_fetch_ok
+        if offline:
+            handler.status_msg = "Offline, showing cached tips..."
+        # 第一帧先画出来 (这时还没有别的线程)，后台同步 / 预取的请求不算进启动耗时
+        handler.refresh_ui()
+        handler.start_background_sync(immediate=offline)
+        handler.prefetch_groups()
+        handler.start_reminders()
 
         COMMAND_MAP = {
             'r': handler.refresh,
             'a': handler.add_tip,
             'd': handler.delete_tip,
             'c': handler.change_state,
+            'pn': handler.page_private_next,
+            'pp': handler.page_private_prev,
+            'gn': handler.page_group_next,
+            'gp': handler.page_group_prev,
+            '/query': handler.search_tips,
             'create_group': handler.create_group,
             'join_group': handler.join_group,
             'list_my_groups': handler.list_groups,
@@ -62,16 +94,14 @@ def main():
             'get_my_group': handler.get_my_group,
             'set_group_admin': handler.set_group_admin,
             'enter': handler.enter_group,
+            'profile': handler.switch_profile,
             'help' : handler.show_help,
         }
 
         while True:
-            # 1. 绘制界面
-            handler.refresh_ui()
-            
-            # 2. 获取输入
+            # 1. 绘制界面 + 2. 获取输入
             try:
-                raw_cmd = input(" > ").strip().lower()
+                raw_cmd = handler.read_command().strip().lower()
             except EOFError:
                 break
             
@@ -81,7 +111,8 @@ def main():
             # 3. 【一键分发】查表执行
             if raw_cmd in COMMAND_MAP:
                 func = COMMAND_MAP[raw_cmd]
-                func() # 执行对应的函数
+                with profiler.span(f"dispatch:{raw_cmd}"):
+                    func() # 执行对应的函数
             else:
                 handler.status_msg = f"Unknown command: {raw_cmd}"
 
@@ -91,6 +122,15 @@ def main():
         if in_tui_mode:
             sys.stdout.write(style.Term.ALT_SCREEN_OFF)
             sys.stdout.flush()
+        if handler is not None:
+            handler.stop_reminders()
+        # 切换过的 profile 也都在这里面
+        sessions.close()
+        startup = profiler.startup_summary() if profiler.enabled else None
+        if startup:
+            print(f"Startup: {startup}")
+        for path in profiler.finish():
+            print(f"Profile written: {path}")
         print("Bye!")
 
 if __name__ == "__main__":
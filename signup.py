@@ -1,7 +1,7 @@
 from getpass import getpass
 from core.client import TipsClient
 
-def signup():
+def signup(profile=None):
     print("Sign up Need an invite code.")
     u = input("Choose a username: ").strip()
     p = getpass("Choose a password: ").strip()
@@ -13,7 +13,7 @@ def signup():
         print("Passwords do not match. Exiting.")
         exit(1)
     invite_code = input("Invite Code: ").strip()
-    client = TipsClient()
+    client = TipsClient(profile=profile)
     success, msg = client.sign_up(u, p, invite_code)
     print(msg)
 
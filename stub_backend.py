@@ -0,0 +1,341 @@
+# stub_backend.py
+"""
+本地假后端 (Local stub of the tips backend)
+
+Keeps tips in memory and speaks the same JSON as the real server, so the client
+can be exercised offline:
+
+    python stub_backend.py --port 8765      # 然后把 config.SERVER_URL 指向它
+
+or in-process, without sockets:
+
+    backend = StubBackend()
+    client = TipsClient(server_url=STUB_URL)
+    backend.mount(client.session)
+"""
+import json
+import random
+import re
+import threading
+from urllib.parse import urlsplit, parse_qs
+from requests.adapters import BaseAdapter
+from requests.models import Response
+
+STUB_URL = "http://stub.local"
+
+
+class StubBackend:
+    def __init__(self, username="stub", user_id=1):
+        self.username = username
+        self.user_id = user_id
+        self.lock = threading.Lock()
+        # 长轮询: 有新版本时唤醒挂起的 /show_tips/?wait=N
+        self.changed = threading.Condition(self.lock)
+
+        self.version = 0        # 全局版本号，同时也是 sync cursor
+        self.min_cursor = 0     # 比它更旧的 cursor 会被拒绝 (410)
+        self.next_id = 1
+        self.tips = {}          # real_id -> tip dict (+ 'version')
+        self.tombstones = {}    # real_id -> version when deleted
+        self.groups = {}        # group_id -> {'id', 'name', ...}
+
+        self.users = {username: (user_id, "stub")}   # username -> (user_id, password)
+        self._private_key = None
+
+    # === Data helpers ===
+    def _bump(self):
+        self.version += 1
+        self.changed.notify_all()
+        return self.version
+
+    def add(self, content, ddl=None, group_id=None, is_done=False, owner_name=None):
+        """Insert a tip directly (used by tests / benchmarks to seed data)"""
+        with self.lock:
+            return self._add(content, ddl, group_id, is_done, owner_name)
+
+    def _add(self, content, ddl, group_id, is_done=False, owner_name=None):
+        real_id = self.next_id
+        self.next_id += 1
+        if group_id is not None and group_id not in self.groups:
+            self.groups[group_id] = {'id': group_id, 'name': f"Group {group_id}"}
+        self.tips[real_id] = {
+            'id': real_id,
+            'content': content,
+            'ddl': ddl,
+            'is_done': is_done,
+            'group_id': group_id,
+            'owner_name': owner_name or self.username,
+            'version': self._bump(),
+        }
+        return real_id
+
+    def compact(self):
+        """Forget tombstones; every cursor older than now gets rejected"""
+        with self.lock:
+            self.tombstones.clear()
+            self.min_cursor = self.version
+
+    def _render_tip(self, tip):
+        out = {
+            'index': tip['id'],
+            'content': tip['content'],
+            'ddl': tip['ddl'],
+            'is_done': tip['is_done'],
+        }
+        if tip['group_id'] is not None:
+            out['group_id'] = tip['group_id']
+            out['group_name'] = self.groups[tip['group_id']]['name']
+            out['owner_name'] = tip['owner_name']
+            out['completed_members'] = [self.username] if tip['is_done'] else []
+        return out
+
+    # === RSA (login / signup) ===
+    def rotate_key(self):
+        """Generate a new key pair; clients holding the old public key get rejected"""
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def _decrypt(self, enc_pwd):
+        import base64
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+        try:
+            return self._private_key.decrypt(
+                base64.b64decode(enc_pwd),
+                padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+            ).decode('utf-8')
+        except Exception:
+            return None
+
+    def public_key(self, params, body):
+        from cryptography.hazmat.primitives import serialization
+        if self._private_key is None:
+            self.rotate_key()
+        pem = self._private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        return 200, {'public_key': pem.decode('utf-8')}
+
+    def login(self, params, body):
+        if self._private_key is None:
+            return 400, {'detail': 'decrypt failed'}
+        password = self._decrypt(body.get('password', ''))
+        if password is None:
+            return 400, {'detail': 'decrypt failed'}
+        user = self.users.get(body.get('username'))
+        if user is None or user[1] != password:
+            return 401, {'detail': 'Incorrect username or password'}
+        return 200, {'user_id': user[0]}
+
+    def signup(self, params, body):
+        if self._private_key is None:
+            return 400, {'detail': 'decrypt failed'}
+        password = self._decrypt(body.get('password', ''))
+        if password is None:
+            return 400, {'detail': 'decrypt failed'}
+        if body.get('username') in self.users:
+            return 400, {'detail': 'Username already registered'}
+        self.users[body['username']] = (len(self.users) + 1, password)
+        return 200, {'detail': 'ok'}
+
+    # === Routes ===
+    def show_tips(self, params, body):
+        since = params.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return 409, {'detail': 'bad cursor'}
+            if since < self.min_cursor:
+                return 410, {'detail': 'cursor expired'}
+            wait = float(params.get('wait') or 0)
+            if wait:
+                self.changed.wait_for(lambda: self.version > since, timeout=wait)
+
+        selected = [t for t in self.tips.values() if since is None or t['version'] > since]
+        data = {
+            'private_tips': [self._render_tip(t) for t in selected if t['group_id'] is None],
+            'public_tips': [self._render_tip(t) for t in selected if t['group_id'] is not None],
+            'maps': {str(t['id']): t['id'] for t in selected},
+            'group_id': None,
+            'cursor': str(self.version),
+            'long_poll': True,
+        }
+        if since is not None:
+            data['delta'] = True
+            data['deleted'] = [rid for rid, v in self.tombstones.items() if v > since]
+        return 200, data
+
+    def add_tip(self, params, body):
+        self._add(body.get('content'), body.get('ddl'), body.get('group_id'))
+        return 200, {'detail': 'ok'}
+
+    def delete_tips(self, params, body):
+        for rid in body.get('tips_ids', []):
+            if self.tips.pop(rid, None) is not None:
+                self.tombstones[rid] = self._bump()
+        return 200, {'detail': 'ok'}
+
+    def change_tip_state(self, params, body):
+        for rid in body.get('tips_ids', []):
+            tip = self.tips.get(rid)
+            if tip is not None:
+                tip['is_done'] = not tip['is_done']
+                tip['version'] = self._bump()
+        return 200, {'detail': 'ok'}
+
+    def groups_my(self, params, body):
+        return 200, {'groups': [
+            {'id': g['id'], 'name': g['name'], 'role': 'owner', 'invite_code': f"CODE{g['id']}"}
+            for g in self.groups.values()
+        ]}
+
+    def groups_create(self, params, body):
+        gid = max(self.groups, default=0) + 1
+        self.groups[gid] = {'id': gid, 'name': body.get('name') or f"Group {gid}"}
+        return 200, {'invite_code': f"CODE{gid}"}
+
+    def groups_join(self, params, body, code):
+        gid = int(code[4:]) if code.startswith("CODE") and code[4:].isdigit() else None
+        if gid not in self.groups:
+            return 404, {'detail': 'Invalid invite code'}
+        return 200, {'detail': 'ok'}
+
+    def groups_info(self, params, body, group_id):
+        if not group_id.isdigit() or int(group_id) not in self.groups:
+            return 404, {'detail': 'Group not found'}
+        return 200, {'members': [{'user_id': self.user_id, 'username': self.username, 'role': 'owner'}]}
+
+    def groups_set_admin(self, params, body):
+        gid = str(body.get('group_id'))
+        if not gid.isdigit() or int(gid) not in self.groups:
+            return 404, {'detail': 'Group not found'}
+        return 200, {'detail': 'ok'}
+
+    # === Bulk data for benchmarks ===
+    def populate(self, n, groups=20, members=50, done_ratio=0.3, seed=1):
+        """Seed `n` tips: one third private, the rest spread over `groups` groups"""
+        rnd = random.Random(seed)
+        names = [f"成员{i}" for i in range(members)]
+        with self.lock:
+            for gid in range(1, groups + 1):
+                self.groups.setdefault(gid, {'id': gid, 'name': f"小组{gid}"})
+            for i in range(n):
+                ddl = f"{rnd.randint(25, 27)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} {rnd.randint(0, 23):02d}:00"
+                gid = rnd.randint(1, groups) if i % 3 else None
+                self._add(f"第{i}条便签 - 记得处理一下这个事情", ddl, gid,
+                          is_done=rnd.random() < done_ratio, owner_name=rnd.choice(names))
+
+    ROUTES = {
+        ('GET', '/public_key/'): 'public_key',
+        ('POST', '/login/'): 'login',
+        ('POST', '/users/signup/'): 'signup',
+        ('GET', '/show_tips/'): 'show_tips',
+        ('POST', '/add_tip/'): 'add_tip',
+        ('POST', '/delete_tips/'): 'delete_tips',
+        ('POST', '/change_tip_state/'): 'change_tip_state',
+        ('GET', '/groups/my'): 'groups_my',
+        ('POST', '/groups/create'): 'groups_create',
+        ('POST', '/groups/set_admin'): 'groups_set_admin',
+    }
+
+    # 带路径参数的路由
+    PATTERN_ROUTES = [
+        ('POST', re.compile(r'^/groups/join/([^/]+)$'), 'groups_join'),
+        ('GET', re.compile(r'^/groups/([^/]+)/info$'), 'groups_info'),
+    ]
+
+    def handle(self, method, url, body=None):
+        """Dispatch one request; returns (status_code, json_payload)"""
+        parts = urlsplit(url)
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        method = method.upper()
+        route, args = self.ROUTES.get((method, parts.path)), ()
+        if route is None:
+            for m, pattern, name in self.PATTERN_ROUTES:
+                match = pattern.match(parts.path)
+                if m == method and match:
+                    route, args = name, match.groups()
+                    break
+        if route is None:
+            return 404, {'detail': 'Not Found'}
+        with self.lock:
+            return getattr(self, route)(params, body or {}, *args)
+
+    # === Transports ===
+    def mount(self, session, prefix=STUB_URL):
+        """Route every request made by `session` under `prefix` to this backend"""
+        session.mount(prefix, StubAdapter(self))
+
+
+def make_response(request, status, content):
+    """A finished requests Response carrying the JSON bytes `content` (for in-process adapters)"""
+    resp = Response()
+    resp.status_code = status
+    resp._content = content
+    resp._content_consumed = True  # 让 iter_content() 从 _content 切片 (流式解析)
+    resp.headers['Content-Type'] = 'application/json'
+    resp.encoding = 'utf-8'
+    resp.url = request.url
+    resp.request = request
+    return resp
+
+
+class StubAdapter(BaseAdapter):
+    """requests transport adapter that answers from a StubBackend in-process"""
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+
+    def send(self, request, **kwargs):
+        body = json.loads(request.body) if request.body else None
+        status, payload = self.backend.handle(request.method, request.url, body)
+        return make_response(request, status, json.dumps(payload).encode('utf-8'))
+
+    def close(self):
+        pass
+
+
+def serve(backend, host="127.0.0.1", port=8765):
+    """Serve the stub over real HTTP (blocking)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def _dispatch(self, method):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            body = json.loads(raw) if raw else None
+            status, payload = backend.handle(method, self.path, body)
+            out = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            if len(out) > 1024 and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+                import gzip
+                out = gzip.compress(out, compresslevel=5)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Stub backend on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Offline stub of the tips backend")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    serve(StubBackend(), port=args.port)
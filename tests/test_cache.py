@@ -0,0 +1,44 @@
+"""TipCache: deltas and full reloads keep the indexes and listeners consistent"""
+from core.cache import TipCache
+from core.tip import Tip
+
+
+def tip(index, real_id, content=None):
+    return Tip(index, real_id, content or f"t{real_id}", "30-01-01 10:00", False)
+
+
+def make_cache(*pairs):
+    cache = TipCache()
+    cache.replace(tip(i, rid) for i, rid in pairs)
+    events = []
+    cache.add_listener(lambda changed, removed, reset: events.append((changed, removed, reset)))
+    return cache, events
+
+
+def test_apply_moves_a_tip_displaced_by_renumbering():
+    cache, events = make_cache((1, 10), (2, 20), (3, 30))
+    removed = cache.apply([tip(2, 30)], [10])
+
+    assert [t.real_id for t in removed] == [10]
+    assert [(t.index, t.real_id) for t in cache] == [(2, 30), (3, 20)]
+    assert cache.by_real_id(20).index == 3
+    changed, gone, reset = events[-1]
+    assert not reset
+    assert sorted(t.real_id for t in changed) == [20, 30]
+    # 监听器拿到的 removed 覆盖了所有离开原下标的对象
+    assert sorted((t.index, t.real_id) for t in gone) == [(1, 10), (2, 20)]
+
+
+def test_apply_displaced_tip_updated_in_the_same_batch():
+    cache, events = make_cache((1, 10), (2, 20))
+    cache.apply([tip(1, 20), tip(2, 10)], [])
+
+    assert [(t.index, t.real_id) for t in cache] == [(1, 20), (2, 10)]
+    assert len(cache) == 2
+
+
+def test_replace_without_changes_does_not_notify():
+    cache, events = make_cache((1, 10), (2, 20))
+    version = cache.version
+    cache.replace([tip(1, 10), tip(2, 20)])
+    assert cache.version == version and events == []
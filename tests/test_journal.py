@@ -0,0 +1,92 @@
+"""Offline write queue: coalescing and replay against the stub backend"""
+import requests
+
+from core.client import TipsClient
+from core.journal import WriteJournal, coalesce, ADD, DELETE
+from stub_backend import StubBackend, StubAdapter, STUB_URL
+
+
+class FlakyAdapter(StubAdapter):
+    """StubAdapter that refuses connections while `offline` is set"""
+    offline = False
+
+    def send(self, request, **kwargs):
+        if self.offline:
+            raise requests.ConnectionError("offline")
+        return super().send(request, **kwargs)
+
+
+def make_client(tmp_path):
+    backend = StubBackend()
+    backend.add("kept")
+    client = TipsClient(server_url=STUB_URL)
+    client.store_path = None
+    client.journal = WriteJournal(str(tmp_path / "journal.jsonl"))
+    client.current_user = backend.username
+    client.current_user_id = backend.user_id
+    adapter = FlakyAdapter(backend)
+    client.session.mount(STUB_URL, adapter)
+    client.fetch_tips(full=True)
+    return client, backend, adapter
+
+
+def add_then_delete(client, content):
+    mutation, _ = client.stage_add_tip(content, "30-01-01 10:00")
+    client.commit(mutation)
+    index = client.local_cache.max_index()
+    mutation, _ = client.stage_delete_tips(str(index))
+    return client.commit(mutation)
+
+
+def server_contents(backend):
+    return sorted(t['content'] for t in backend.tips.values())
+
+
+def test_coalesce_drops_add_and_delete_of_the_same_placeholder():
+    entries = [
+        {'user': 'u', 'path': ADD, 'body': {'content': 'x'}, 'temp_id': -5},
+        {'user': 'u', 'path': DELETE, 'body': {'tips_ids': [-5], 'group_id': None}},
+    ]
+    assert coalesce(entries) == []
+
+
+def test_coalesce_keeps_delete_of_a_placeholder_added_earlier():
+    entries = [{'user': 'u', 'path': DELETE, 'body': {'tips_ids': [-5, 7], 'group_id': None}}]
+    plan = coalesce(entries)
+    assert [(e['path'], e['body']['tips_ids']) for e in plan] == [(DELETE, [-5, 7])]
+
+
+def test_add_and_delete_while_offline_never_reach_the_server(tmp_path):
+    client, backend, adapter = make_client(tmp_path)
+    adapter.offline = True
+    msg, ok = add_then_delete(client, "gone")
+    assert ok and "queued" in msg
+
+    adapter.offline = False
+    client.fetch_tips()
+    assert server_contents(backend) == ["kept"]
+    assert [t.content for t in client.local_cache] == ["kept"]
+    assert client.journal.count(client.current_user) == 0
+
+
+def test_delete_queued_after_the_add_was_sent_reaches_the_real_tip(tmp_path):
+    client, backend, adapter = make_client(tmp_path)
+    mutation, _ = client.stage_add_tip("gone", "30-01-01 10:00")
+    assert client.commit(mutation)[1]
+    adapter.offline = True
+    # 队列里已经有别的写：删除直接排进队列，带着还没换掉的临时 id
+    mutation, _ = client.stage_change_tip_state(str(client.local_cache[0].index))
+    assert client.commit(mutation)[1]
+    index = client.local_cache.max_index()
+    mutation, _ = client.stage_delete_tips(str(index))
+    assert client.commit(mutation)[1]
+
+    adapter.offline = False
+    # 第一次同步时真实 tip 才回来：删除先留在队列里，下一次再发
+    client.fetch_tips()
+    assert client.journal.count(client.current_user) == 1
+    client.fetch_tips()
+    assert server_contents(backend) == ["kept"]
+    assert [t.content for t in client.local_cache] == ["kept"]
+    assert client.journal.count(client.current_user) == 0
+    assert client.write_conflicts == []
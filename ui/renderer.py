@@ -1,11 +1,15 @@
 import sys
-import os
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich import box
 from rich.text import Text
+from core.deadline import parse_ddl, classify, StatusBoard  # noqa: F401  (parse_ddl: 旧代码从这里引用)
+from ui.screen import Screen, render_lines, PROMPT_RESERVE
+from core import profiler
+from config import DEFAULT_PROFILE
 
 # =============================================================================
 # 1. 样式配置区 (UI_CONFIG) 
@@ -46,7 +50,7 @@ UI_CONFIG = {
     # --- 布局参数 ---
     "layout": {
         "width": 80,            # 整体宽度
-        "max_rows": 8,          # 面板最大显示行数(暂时不用)
+        "max_rows": 8,          # 面板最大显示行数 (终端不够高时自动再缩小)
         "col_id_width": 4,      # ID列宽度
         "col_ddl_width": 16,    # 时间列宽度
         "col_done_width": 4,    # 状态列宽度
@@ -56,66 +60,120 @@ UI_CONFIG = {
 # 初始化 Rich
 console = Console()
 
+# 差分屏幕：只重写变化的行
+screen = Screen(sys.stdout, console)
+
+# 每个区域渲染好的行，key 不变就直接复用: name -> (key, lines)
+_region_cache = {}
+
+# 每个面板的滚动位置 (第几条 tip 开始显示)
+viewport = {"private": 0, "group": 0, "group_id": None}
+# 每个群组上次看到的位置，切回来时恢复
+group_offsets = {}
+# 每个面板上一帧用的取数函数 (翻页时按真实行高计算步长)
+_panel_source = {}
+
+# DDL 状态分桶：只在缓存变化或跨过时间边界时重算
+status_board = StatusBoard()
+
 # =============================================================================
 # 2. 辅助逻辑函数
 # =============================================================================
 
-def clear_screen():
-    # Windows 用 cls，macOS/Linux 用 clear
-    command = 'cls' if os.name == 'nt' else 'clear'
-    os.system(command)
+def invalidate():
+    """画面被别人改过 (切出/切回 alt screen)，下一帧全量重绘"""
+    screen.invalidate()
 
-def parse_ddl(raw_ddl):
-    """尝试解析时间格式，返回 datetime 对象或 None"""
-    if not raw_ddl:
-        return None
-    
-    # 优先尝试 ISO 格式
-    if "T" in raw_ddl:
-        try:
-            return datetime.fromisoformat(raw_ddl)
-        except ValueError:
-            pass
-
-    formats = [
-        '%y-%m-%d %H:%M', '%Y-%m-%d %H:%M', 
-        '%Y-%m-%d %H:%M:%S', '%y-%m-%d %H:%M:%S', '%Y-%m-%d'
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(raw_ddl, fmt)
-        except ValueError:
-            continue
-    return None
-
-def get_status_style_key(ddl_dt, is_done):
+def reset_view():
+    """换了一个 client (切换 profile)：缓存的区域、状态分桶和视口都作废"""
+    _region_cache.clear()
+    status_board.reset()
+    viewport.update({"private": 0, "group": 0, "group_id": None})
+    group_offsets.clear()
+    _panel_source.clear()
+    screen.invalidate()
+
+def panel_rows():
+    """每个面板最多显示几行：只取决于终端高度和 max_rows，与 tip 总数无关"""
+    # header(2) + 两个面板的边框和表头(2*3) + footer(5) + 提示符预留
+    chrome = 2 + 2 * 3 + 5 + PROMPT_RESERVE
+    by_height = (console.height - chrome) // 2
+    return max(1, min(UI_CONFIG["layout"]["max_rows"], by_height))
+
+def _fit(tips, rows):
+    """按顺序能放进 rows 行的 tip 数 (带 "Done:" 行的占两行，至少放一条)"""
+    count, used = 0, 0
+    for tip in tips:
+        height = 2 if tip.completed_members else 1
+        if count and used + height > rows:
+            break
+        count += 1
+        used += height
+    return count
+
+def scroll(panel, pages):
+    """
+    翻页：panel 是 'private' / 'group'，pages 为正往下、为负往上。
+    A page is as many tips as fit in the panel, not panel_rows(): two-row
+    tips make it shorter, and paging back walks up from the current top.
+    """
+    rows = panel_rows()
+    fetch = _panel_source.get(panel)
+    start = viewport[panel]
+    for _ in range(abs(pages)):
+        if pages > 0:
+            step = _fit(fetch(start, start + rows), rows) if fetch else rows
+            if not step:
+                break
+            start += step
+        else:
+            if start <= 0:
+                break
+            above = fetch(max(0, start - rows), start) if fetch else ()
+            start -= _fit(reversed(above), rows) if above else min(start, rows)
+    viewport[panel] = max(0, start)
+
+def _visible_window(fetch, total, panel):
+    """
+    取当前视口里的 tips：只格式化能显示的那几条。
+    Group tips with a "Done:" line take two rows, so the window is trimmed
+    to the row budget. Returns (tips, hidden_above, hidden_below).
+    """
+    rows = panel_rows()
+    # 翻过头时停在最后满满一页 (从末尾往上数能放下几条)，而不是只剩最后一条
+    tail = fetch(max(0, total - rows), total)
+    start = min(viewport[panel], total - _fit(reversed(tail), rows))
+    viewport[panel] = start
+    _panel_source[panel] = fetch
+
+    window = fetch(start, start + rows)
+    shown = window[:_fit(window, rows)]
+    return shown, start, max(0, total - start - len(shown))
+
+def _region(name, key, build):
+    """按 key 缓存某个区域渲染出来的行"""
+    hit = _region_cache.get(name)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    lines = render_lines(build(), console)
+    _region_cache[name] = (key, lines)
+    return lines
+
+def get_status_style_key(ddl_dt, is_done, now=None):
     """根据时间和状态，返回 UI_CONFIG 中的颜色键名"""
-    if is_done:
-        return "status_done"
-    
-    if ddl_dt is None:
-        return "status_none"
-
-    now = datetime.now()
-    if ddl_dt < now:
-        return "status_overdue"
-    elif ddl_dt < now + timedelta(days=1):
-        return "status_urgent"
-    else:
-        return "status_future"
+    return classify(ddl_dt, is_done, now or datetime.now())
 
 def format_group_content(item):
     """处理群组便签的显示文本（发送者 + 内容 + 完成名单）"""
-    content = item.get('content', '')
-    owner = item.get('owner', 'Unknown')
+    content = item.content
+    owner = item.owner or 'Unknown'
     
     # 1. 拼装第一行：发送者 + 内容
     sender_style = UI_CONFIG['theme']['content_sender']
     display_text = f"[{sender_style}]{owner}[/]: {content}"
 
     # 2. 拼装第二行：完成者名单
-    comps = item.get('completed_members', [])
+    comps = item.completed_members
     if comps:
         joined = ", ".join(comps)
         
@@ -128,8 +186,8 @@ def format_group_content(item):
 # 3. 组件渲染函数
 # =============================================================================
 
-def create_list_panel(title, tips_list, border_color):
-    """绘制通用的列表面板"""
+def create_list_panel(title, tips_list, border_color, above=0, below=0):
+    """绘制通用的列表面板 (tips_list 只是可见窗口，above/below 是上下隐藏的条数)"""
     layout = UI_CONFIG["layout"]
     icons = UI_CONFIG["icons"]
     theme = UI_CONFIG["theme"]
@@ -154,15 +212,14 @@ def create_list_panel(title, tips_list, border_color):
 
     # 遍历数据
     for item in tips_list:
-        # A. 准备数据
-        raw_ddl = item.get('ddl')
-        is_done = item.get('is_done', False)
-        idx = str(item.get('index', '?'))
-        is_group = (item.get('type') == 'GROUP')
-
-        # B. 计算样式
-        ddl_dt = parse_ddl(raw_ddl)
-        style_key = get_status_style_key(ddl_dt, is_done)
+        # A. 准备数据 (item 是 core.tip.Tip，ddl 在入库时已解析)
+        raw_ddl = item.ddl
+        is_done = item.is_done
+        idx = str(item.index)
+        is_group = item.is_group
+
+        # B. 计算样式 (status_board 已经按同一个 now 批量分好桶)
+        style_key = status_board.bucket(item)
         color_tag = theme[style_key] # 从配置获取颜色 (如 "bold red")
         
         # C. 准备内容列
@@ -170,7 +227,7 @@ def create_list_panel(title, tips_list, border_color):
             content_display = format_group_content(item)
         else:
             # 私人内容简单截断
-            content_display = item.get('content', '')
+            content_display = item.content
 
 
         # D. 准备图标
@@ -186,10 +243,19 @@ def create_list_panel(title, tips_list, border_color):
             content_display
         )
 
+    # 固定在面板底边的 "还有 N 条" 提示
+    hints = []
+    if above:
+        hints.append(f"↑ {above} above")
+    if below:
+        hints.append(f"↓ {below} more")
+
     return Panel(
         table,
         title=f"[bold {border_color}]{title}[/]",
         title_align="left",
+        subtitle=f"[dim]{' · '.join(hints)}[/]" if hints else None,
+        subtitle_align="right",
         border_style=f"bold {border_color}",
         box=box.ROUNDED,
         width=layout["width"],
@@ -197,7 +263,7 @@ def create_list_panel(title, tips_list, border_color):
     )
 
 def draw_main_ui(client_obj, status_msg):
-    clear_screen()
+    started = time.perf_counter()
     
     # 快捷引用配置
     theme = UI_CONFIG["theme"]
@@ -206,79 +272,71 @@ def draw_main_ui(client_obj, status_msg):
     # =========================================================
     # 1. 数据准备 & 过滤
     # =========================================================
-    all_tips = getattr(client_obj, 'local_cache', [])
+    # local_cache 是 core.cache.TipCache，按类型/群组都有现成索引
+    cache = client_obj.local_cache
     
-    # --- 1.1 私人便签 (永远显示) ---
-    private_list = [t for t in all_tips if t.get('type') == 'PRIVATE']
+    # --- 1.1 私人便签 (永远显示，只取视口里的几条) ---
+    private_list, p_above, p_below = _visible_window(
+        lambda a, b: cache.of_type('PRIVATE', a, b), cache.count_type('PRIVATE'), "private")
 
-    # --- 1.2 群组便签 (根据 current_group_id 过滤) ---
+    # --- 1.2 群组便签 (根据 current_group_id 取索引) ---
     current_gid = getattr(client_obj, 'current_group_id', None)
+    if viewport["group_id"] != current_gid:
+        # 换了群组：记下旧群组的位置，新群组从上次的位置 (没看过就从头) 开始
+        group_offsets[viewport["group_id"]] = viewport["group"]
+        viewport["group"], viewport["group_id"] = group_offsets.get(current_gid, 0), current_gid
     
-    group_list = []
-    # 只有当用户确实进入了某个群组时，才去筛选
+    group_list, g_above, g_below = [], 0, 0
+    # 只有当用户确实进入了某个群组时，才去取 (int/str 在索引里已统一)
     if current_gid is not None:
-        for t in all_tips:
-            if t.get('type') == 'GROUP':
-                # 强转字符串比较，防止 int/str 类型不一致导致匹配失败
-                if str(t.get('group_id')) == str(current_gid):
-                    group_list.append(t)
+        group_list, g_above, g_below = _visible_window(
+            lambda a, b: cache.in_group(current_gid, a, b), cache.count_group(current_gid), "group")
 
     # =========================================================
     # 2. 修正群组名称 
     # =========================================================
-    g_name = getattr(client_obj, 'current_group_name', 'None')
-    
+    # 群名来自 client 的群组元数据缓存 (core/groups.py)，不再从 tips 里找
     if current_gid is None:
         g_name = "No Group Selected"
-    elif group_list and (g_name in ['None', 'Unknown', 'Unknown Group']):
-        # 从数据里得到真正的群名
-        first_real_name = group_list[0].get('group_name')
-        if first_real_name:
-            g_name = first_real_name
-            # (可选) 顺手帮 client 更新一下，下次渲染就不用再偷了
-            if hasattr(client_obj, 'current_group_name'):
-                client_obj.current_group_name = g_name
-    elif g_name == 'None':
-        # 如果既没名字，列表也是空的
-        g_name = f"Group ID: {current_gid}"
+    else:
+        g_name = client_obj.group_name(current_gid)
 
     # =========================================================
-    # 3. 绘制 Header
+    # 3. Header
     # =========================================================
     now_str = datetime.now().strftime('%H:%M')
     user_name = getattr(client_obj, 'current_user', 'User') 
     user_id = getattr(client_obj, 'current_user_id', 'ID')
-    header = Text()
-    header.append(" TIPS CLIENT ", style=f"{theme['header_fg']} on {theme['header_bg']}")
-    header.append(f" User: {user_name}#ID:{user_id} ", style=theme['user_highlight'])
-    header.append(f"| {now_str}", style="dim")
-    
-    console.print(header)
-    console.print("") # 空行
+    profile = getattr(client_obj, 'profile', None)
+    profile_name = profile.name if profile is not None and profile.name != DEFAULT_PROFILE else ""
+
+    def build_header():
+        header = Text()
+        header.append(" TIPS CLIENT ", style=f"{theme['header_fg']} on {theme['header_bg']}")
+        header.append(f" User: {user_name}#ID:{user_id} ", style=theme['user_highlight'])
+        if profile_name:
+            header.append(f"[{profile_name}] ", style="bold magenta")
+        header.append(f"| {now_str}", style="dim")
+        return [header, ""]
+
+    lines = _region("header", (now_str, user_name, user_id, profile_name, console.width), build_header)
 
     # =========================================================
-    # 4. 绘制两个面板
+    # 4. 两个面板 (数据没变、没有 tip 换桶就复用上一帧的行)
     # =========================================================
-    # 私人面板
-    console.print(create_list_panel(
-        "🏠 Private Tips", 
-        private_list, 
-        theme["border_private"]
-    ))
-
-    # 群组面板
-    console.print(create_list_panel(
-        f"👥 Group: {g_name}", 
-        group_list, 
-        theme["border_group"]
-    ))
+    status_board.refresh(cache)
+    lines = lines + _region(
+        "private", (status_board.generation, p_above, p_below, panel_rows(), console.width),
+        lambda: [create_list_panel("🏠 Private Tips", private_list, theme["border_private"], p_above, p_below)]
+    )
+    lines = lines + _region(
+        "group", (status_board.generation, current_gid, g_name, g_above, g_below, panel_rows(), console.width),
+        lambda: [create_list_panel(f"👥 Group: {g_name}", group_list, theme["border_group"], g_above, g_below)]
+    )
 
     # =========================================================
     # 5. Footer & Status
     # =========================================================
-    console.print("")
-    console.print(f"[dim]{'-' * layout['width']}[/]")
-    
     # --- 状态栏防溢出处理 ---
     status_str = str(status_msg).replace('\n', ' | ')
     # 预留一点空间给 "Status: " 字样
@@ -286,8 +344,31 @@ def draw_main_ui(client_obj, status_msg):
     
     # if len(status_str) > limit_len: 
     #     status_str = status_str[:limit_len-3] + "..."
-    
-    console.print(f"[{theme['status_urgent']}] 🔔 Status: {status_str}[/]")
-    console.print(f"[dim]{'-' * layout['width']}[/]")
 
-    console.print("[bold white] Command : help for help ; r for refresh ; q to quit [/bold white]")
\ No newline at end of file
+    # --profile: 最近几个热点的 avg/p95
+    perf_str = profiler.summary() if profiler.enabled else ""
+
+    def build_footer():
+        footer = [
+            "",
+            f"[dim]{'-' * layout['width']}[/]",
+            f"[{theme['status_urgent']}] 🔔 Status: {status_str}[/]",
+        ]
+        if perf_str:
+            footer.append(Text(f" ⏱ {perf_str}", style="dim cyan"))
+        footer += [
+            f"[dim]{'-' * layout['width']}[/]",
+            "[bold white] Command : help for help ; r for refresh ; pn/pp gn/gp to page ; q to quit [/bold white]",
+        ]
+        return footer
+
+    lines = lines + _region("footer", (status_str, perf_str, console.width), build_footer)
+
+    # =========================================================
+    # 6. 只把变化的行写到终端
+    # =========================================================
+    rows = screen.draw(lines)
+
+    if profiler.enabled:
+        profiler.record("frame", started, time.perf_counter(), {"rows": rows})
+        profiler.first_frame()
@@ -0,0 +1,73 @@
+# ui/screen.py
+"""
+差分屏幕缓冲 (Diffing screen buffer)
+
+Keeps the lines of the last frame and, for the next one, rewrites only the
+rows that changed using cursor addressing - no `clear` subprocess, no full
+repaint, no flicker. Rich renderables are turned into lines with
+`render_lines` so each UI region can be cached separately.
+"""
+import io
+from rich.console import Console
+from ui.style import Term
+
+# 主提示符下面还要留几行给 input() 的回显 (a/d/c 的多行提问)
+PROMPT_RESERVE = 8
+
+
+def render_lines(renderables, like: Console):
+    """Render Rich objects to a list of ANSI-styled lines at `like`'s width"""
+    buf = io.StringIO()
+    out = Console(
+        file=buf,
+        width=like.width,
+        force_terminal=True,
+        color_system=like.color_system,
+        legacy_windows=False,
+    )
+    for r in renderables:
+        out.print(r)
+    text = buf.getvalue()
+    if text.endswith("\n"):
+        text = text[:-1]
+    return text.split("\n")
+
+
+class Screen:
+    def __init__(self, stream, console: Console):
+        self.stream = stream
+        self.console = console
+        self._lines = None      # None -> 下一帧全量重绘
+        self._size = None
+
+    def invalidate(self):
+        """Forget what is on screen (after leaving/entering the alt screen etc.)"""
+        self._lines = None
+
+    def draw(self, lines):
+        """Bring the terminal to `lines`; returns how many rows were written"""
+        size = (self.console.width, self.console.height)
+        # 尺寸变了或者画面太高 (提示符会把屏幕滚走) 就只能全量重绘
+        if size != self._size or len(lines) + PROMPT_RESERVE > size[1]:
+            self._lines = None
+        self._size = size
+
+        out = []
+        if self._lines is None:
+            out.append(Term.CLEAR)
+            out.extend(line + "\n" for line in lines)
+            rows = len(lines)
+        else:
+            rows = 0
+            prev = self._lines
+            for i, line in enumerate(lines):
+                if i >= len(prev) or prev[i] != line:
+                    out.append(f"\033[{i + 1};1H{line}{Term.RESET}\033[K")
+                    rows += 1
+            # 光标停在画面下一行，清掉上一帧剩下的行和提示符回显
+            out.append(f"\033[{len(lines) + 1};1H\033[J")
+
+        self.stream.write("".join(out))
+        self.stream.flush()
+        self._lines = list(lines)
+        return rows
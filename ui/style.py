@@ -15,4 +15,5 @@ class Term:
     # 屏幕控制
     CLEAR = '\033[H\033[2J'
     ALT_SCREEN_ON = '\033[?1049h'
-    ALT_SCREEN_OFF = '\033[?1049l'
\ No newline at end of file
+    ALT_SCREEN_OFF = '\033[?1049l'
+    BELL = '\a'
\ No newline at end of file